@@ -0,0 +1,18 @@
+#!/usr/bin/env python3.12
+
+from assurance.base.main import Config, Main
+from assurance.elasticsearch import ElasticsearchSession
+
+
+class Backfill(Main):
+    """build the latest state index from the alert and keep-alive history"""
+    async def handler(self):
+        config = Config(**self.read_config())
+        node = config.elasticsearch.node
+        async with ElasticsearchSession(node) as elasticsearch:
+            for index in (node.alert_index, node.keep_alive_index):
+                count = await elasticsearch.backfill_state(index)
+                self.logger.info("backfilled %d states from %s* into %s", count, index, node.state_index)
+
+if __name__ == '__main__':
+    Backfill().run()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3.12
+"""
+Runs the F5 and Fortinet collectors in one process, sharing one Elasticsearch
+client and one Kafka producer. The top level sections of ASSURANCE_CONFIG_DIR
+are shared, the `f5:` and `fortinet:` sections hold the per collector settings
+(devices/managers, data_index, ...). A collector set without section is skipped.
+"""
+import os
+import sys
+
+APPS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(APPS, "f5"), os.path.join(APPS, "fortinet")]
+
+# pylint: disable=wrong-import-position
+from f5 import F5BigIPCollector, F5Config
+from fortinet import FortiConfig, FortiManagerCollector
+
+from assurance.base.main import Config, Main
+from assurance.base.supervisor import Supervisor
+
+COLLECTORS = {
+    "f5": (F5Config, F5BigIPCollector),
+    "fortinet": (FortiConfig, FortiManagerCollector),
+}
+
+
+class Combined(Main):
+    @staticmethod
+    def parse(raw: dict) -> dict[str, Config]:
+        return {section: config_class(**{**raw, **raw[section]})
+                for section, (config_class, _) in COLLECTORS.items() if section in raw}
+
+    async def handler(self):
+        raw = self.read_config()
+        configs = self.parse(raw)
+        shared = Config(**raw)
+        async with self.runtime(shared) as runtime:
+            async with Supervisor(shared.supervision, runtime.stopping) as supervisor:
+                collectors = {section: COLLECTORS[section][1].register(supervisor, config, runtime)
+                              for section, config in configs.items()}
+                if shared.schedule.daemon:
+                    async for reloaded in self.watch_config(self.parse, shared.schedule.reload_interval):
+                        for section, (_, collector) in COLLECTORS.items():
+                            if section not in configs:
+                                if section in reloaded:
+                                    collectors[section] = collector.register(supervisor, reloaded[section], runtime)
+                                continue
+                            # a removed section stops all its collectors
+                            config = reloaded.get(section) or configs[section].model_copy(update={collector.targets_field: []})
+                            collectors[section] = await collector.reconcile(supervisor, collectors[section],
+                                                                            configs[section], config, runtime)
+                            reloaded[section] = config
+                        configs = reloaded
+        return supervisor.exit_code
+
+if __name__ == '__main__':
+    Combined().run()
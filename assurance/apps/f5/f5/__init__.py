@@ -1,4 +1,4 @@
-from .bigip_collector import F5BigIPCollector
+from .f5_collector import F5BigIPCollector
 from .types import F5Config, F5BigIPService
 
 __all__ = ['F5BigIPCollector', 'F5Config', 'F5BigIPService']
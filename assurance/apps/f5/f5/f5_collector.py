@@ -1,8 +1,7 @@
-from asyncio import TaskGroup
 from typing import List, Tuple
 
 from assurance.base.collector import Collector
-from assurance.customer import CustomerClient
+from assurance.base.main import Runtime
 from assurance.einstein import (
     Alert,
     AlertEvent,
@@ -21,17 +20,14 @@ from .types import F5Config, F5BigIPService
 
 
 class F5BigIPCollector(Collector):
-    def __init__(self, bigip: F5BigIP, config: F5Config):
-        super().__init__(config, __name__)
-        self.bigip = bigip
+    targets_field = "devices"
 
-    @staticmethod
-    def register(tg: TaskGroup, config: F5Config):
-        for bigip in config.devices:
-            tg.create_task(F5BigIPCollector(bigip, config).run())
+    def __init__(self, bigip: F5BigIP, config: F5Config, runtime: Runtime|None = None):
+        super().__init__(config, __name__, bigip.name, runtime, bigip.interval)
+        self.bigip = bigip
 
     async def collect(self) -> Tuple[F5BigIPStatus, List[F5BigIPDevice]]:
-        async with F5BigIPSession(self.bigip.node) as f5session:
+        async with self.vendor_session(lambda: F5BigIPSession(self.bigip.node)) as f5session:
             status = await f5session.get_status()
             devices = await f5session.get_devices()
         return status, devices
@@ -53,25 +49,27 @@ class F5BigIPCollector(Collector):
         
         # Process each device in the cluster
         for device in devices:
-            customer = await CustomerClient(self.elasticsearch).get_customer_info(
-                uuid=device.uuid,
-                hostname=self._node_name(device),
-                uuid_required=self.config.uuid_required
-            )
+            with self.device_span(device.name):
+                customer = await self.customers.get_customer_info(
+                    uuid=device.uuid,
+                    hostname=self._node_name(device),
+                    uuid_required=self.config.uuid_required
+                )
             
-            service = F5BigIPService(device=device, customer=customer, status=status)
+                service = F5BigIPService(device=device, customer=customer, status=status)
             
-            # Write device data to Elasticsearch
-            await self.elasticsearch.write_to_monthly(
-                self.config.data_index,
-                service.model_dump()
-            )
+                # Write device data to Elasticsearch
+                await self.write_service(
+                    self.config.data_index,
+                    device.name,
+                    service
+                )
             
-            # Generate and send alerts
-            async for alert in self.check_alerts(service):
-                if alert is not None:
-                    alert.summary = f"F5 BIG-IP Device '{alert.node_name}' is '{alert.event.value}'"
-                    await self.einstein.send_alert(alert)
+                # Generate and send alerts
+                async for alert in self.check_alerts(service):
+                    if alert is not None:
+                        alert.summary = f"F5 BIG-IP Device '{alert.node_name}' is '{alert.event.value}'"
+                        await self.einstein.send_alert(alert)
 
     def _node_name(self, device: F5BigIPDevice) -> str:
         """Get the appropriate node name for the device"""
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from assurance.base.main import Config
 from assurance.customer import Customer
@@ -14,7 +14,7 @@ class F5Config(Config):
 
 
 class F5BigIPService(BaseModel):
-    timestamp: str = datetime.now(timezone.utc).isoformat()
+    timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     status: F5BigIPStatus
     device: F5BigIPDevice
     customer: Customer | None = None
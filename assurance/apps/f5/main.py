@@ -1,15 +1,20 @@
 #!/usr/bin/env python3.12
-import asyncio
-
 from f5 import F5Config, F5BigIPCollector
 from assurance.base.main import Main
+from assurance.base.supervisor import Supervisor
 
 
 class F5BigIP(Main):
     async def handler(self):
         config = F5Config(**self.read_config())
-        async with asyncio.TaskGroup() as tg:
-            F5BigIPCollector.register(tg, config)
+        async with self.runtime(config) as runtime:
+            async with Supervisor(config.supervision, runtime.stopping) as supervisor:
+                collectors = F5BigIPCollector.register(supervisor, config, runtime)
+                if config.schedule.daemon:
+                    async for reloaded in self.watch_config(lambda raw: F5Config(**raw), config.schedule.reload_interval):
+                        collectors = await F5BigIPCollector.reconcile(supervisor, collectors, config, reloaded, runtime)
+                        config = reloaded
+        return supervisor.exit_code
 
 
 if __name__ == '__main__':
@@ -1,9 +1,8 @@
 
-from asyncio import TaskGroup
 from typing import List, Tuple
 
 from assurance.base.collector import Collector
-from assurance.customer import CustomerClient
+from assurance.base.main import Runtime
 from assurance.einstein import (
     Alert,
     AlertEvent,
@@ -22,17 +21,14 @@ from .types import FortiConfig, FortiManagerService
 
 
 class FortiManagerCollector(Collector):
-    def __init__(self, manager: FortiManager, config: FortiConfig):
-        super().__init__(config, __name__)
-        self.manager = manager
+    targets_field = "managers"
 
-    @staticmethod
-    def register(tg: TaskGroup, config: FortiConfig):
-        for manager in config.managers:
-            tg.create_task(FortiManagerCollector(manager, config).run())
+    def __init__(self, manager: FortiManager, config: FortiConfig, runtime: Runtime|None = None):
+        super().__init__(config, __name__, manager.name, runtime, manager.interval)
+        self.manager = manager
 
     async def collect(self) -> Tuple[FortiManagerStatus, List[FortinetDevice]]:
-        async with FortiManagerSession(self.manager.node) as fortimanager:
+        async with self.vendor_session(lambda: FortiManagerSession(self.manager.node)) as fortimanager:
             status = await fortimanager.get_status()
             devices = await fortimanager.get_devices(self.config.with_adoms)
         return status, devices
@@ -46,13 +42,14 @@ class FortiManagerCollector(Collector):
                                                             alert_source = "Producer_COLLECTOR-FORTINET",
                                                             sla_code = self.manager.sla_code ))
         for device in devices:
-            customer = await CustomerClient(self.elasticsearch).get_customer_info(uuid=device.uuid, hostname=self._node_name(device), uuid_required=self.config.uuid_required)
-            service = FortiManagerService(device=device, customer=customer, status=status)
-            await self.elasticsearch.write_to_monthly(self.config.data_index, service.model_dump())
-            async for alert in self.check_alerts(service):
-                if alert is not None:
-                    alert.summary = f"Fortinet Firewall/Device '{alert.node_name}' is '{alert.event.value}'"
-                    await self.einstein.send_alert(alert)
+            with self.device_span(device.name):
+                customer = await self.customers.get_customer_info(uuid=device.uuid, hostname=self._node_name(device), uuid_required=self.config.uuid_required)
+                service = FortiManagerService(device=device, customer=customer, status=status)
+                await self.write_service(self.config.data_index, device.name, service)
+                async for alert in self.check_alerts(service):
+                    if alert is not None:
+                        alert.summary = f"Fortinet Firewall/Device '{alert.node_name}' is '{alert.event.value}'"
+                        await self.einstein.send_alert(alert)
 
     def _node_name(self, device: FortinetDevice) -> str:
         if device.ha_mode != "standalone" and device.ha_slave is not None and len(device.ha_slave):
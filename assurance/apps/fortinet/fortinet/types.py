@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from assurance.base.main import Config
 from assurance.customer import Customer
@@ -15,7 +15,7 @@ class FortiConfig(Config):
     with_adoms: bool = True
 
 class FortiManagerService(BaseModel):
-    timestamp: str = datetime.now(timezone.utc).isoformat()
+    timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     status: FortiManagerStatus
     device: FortinetDevice
     customer: Customer|None = None
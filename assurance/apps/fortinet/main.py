@@ -1,17 +1,22 @@
 #!/usr/bin/env python3.12
 
-import asyncio
-
 from fortinet import FortiConfig, FortiManagerCollector
 
 from assurance.base.main import Main
+from assurance.base.supervisor import Supervisor
 
 
 class Fortinet(Main):
     async def handler(self):
         config = FortiConfig(**self.read_config())
-        async with asyncio.TaskGroup() as tg:
-            FortiManagerCollector.register(tg, config)
+        async with self.runtime(config) as runtime:
+            async with Supervisor(config.supervision, runtime.stopping) as supervisor:
+                collectors = FortiManagerCollector.register(supervisor, config, runtime)
+                if config.schedule.daemon:
+                    async for reloaded in self.watch_config(lambda raw: FortiConfig(**raw), config.schedule.reload_interval):
+                        collectors = await FortiManagerCollector.reconcile(supervisor, collectors, config, reloaded, runtime)
+                        config = reloaded
+        return supervisor.exit_code
 
 if __name__ == '__main__':
     Fortinet().run()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3.12
+
+from assurance.base.main import Config, Main
+from assurance.elasticsearch import ElasticsearchSession
+from assurance.rollup import Rollup, RollupJob
+
+
+class RollupConfig(Config):
+    rollup: Rollup
+
+
+class DeviceRollup(Main):
+    """write hourly and daily aggregates of the raw device documents"""
+    async def handler(self):
+        config = RollupConfig(**self.read_config())
+        async with ElasticsearchSession(config.elasticsearch.node) as elasticsearch:
+            await RollupJob(config.rollup, elasticsearch).run()
+
+if __name__ == '__main__':
+    DeviceRollup().run()
@@ -1,26 +1,113 @@
+import asyncio
+import math
+import random
 from abc import ABC, abstractmethod
-from asyncio import TaskGroup
-from typing import Tuple
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    AsyncExitStack,
+    asynccontextmanager,
+)
+from typing import Any, AsyncIterator, Callable, Tuple
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
 from assurance.base.assurance import Assurance, AssuranceException
+from assurance.base.delta import DeltaTracker
+from assurance.base.documents import DocumentWriter
+from assurance.base.main import Runtime
+from assurance.base.metrics import REGISTRY, STAGE_LATENCY, current_target
+from assurance.base.supervisor import Supervisor
+from assurance.base.tracing import TRACER, Span
+from assurance.customer import CustomerClient, CustomerSnapshot
 from assurance.einstein import EinsteinSession
 from assurance.elasticsearch import ElasticsearchSession
 
 
+# settings of the Runtime, a reloaded configuration cannot change them
+RUNTIME_FIELDS = ("config_dir", "elasticsearch", "einstein", "customer", "output", "workers", "lease", "supervision",
+                  "metrics", "tracing", "loop_monitor")
+
+CYCLES = REGISTRY.counter("assurance_cycles_total", "collection cycles by result", ("target", "result"))
+SKIPPED = REGISTRY.counter("assurance_cycles_skipped_total", "daemon runs skipped because a cycle overran", ("target",))
+
+
 class Collector[T](ABC, Assurance):
+    """Collects one target (manager/device) of the config field targets_field.
+    Subclasses are constructed as cls(target, config, runtime)."""
+    targets_field = ""
 
-    def __init__(self, config: T, name: str = __name__):
+    def __init__(self, config: T, name: str = __name__, target: str = "", runtime: Runtime|None = None,
+                 interval: float|None = None):
         Assurance.__init__(self, name)
         self.config: T = config
+        self.target = target or name
+        self.runtime = runtime
+        self.interval = interval or self.config.schedule.interval # type: ignore
+        self._resources: AsyncExitStack|None = None # open while serving, see vendor_session
+        self._vendor: tuple[AsyncExitStack, Any, float, float]|None = None # stack, session, opened, last used
+        self._stop = asyncio.Event()
         self.elasticsearch: ElasticsearchSession
         self.einstein: EinsteinSession
+        self.customers: CustomerClient
+        if runtime is not None:
+            self.customer_snapshot = runtime.customer_snapshot
+        else:
+            self.customer_snapshot = CustomerSnapshot(self.config.customer) # type: ignore
+        self.delta = DeltaTracker(self.config.delta, self.target) # type: ignore
+        self.documents = DocumentWriter(self.config.documents) # type: ignore
 
-    @staticmethod
-    @abstractmethod
-    def register(tg: TaskGroup, config: T):
-        pass
+    @classmethod
+    def targets(cls, config: T, runtime: Runtime|None = None) -> dict[str, BaseModel]:
+        """the targets run by this process, by name"""
+        targets = getattr(config, cls.targets_field)
+        if runtime is not None:
+            targets = runtime.partition(targets)
+        return {target.name: target for target in targets}
+
+    @classmethod
+    def register(cls, supervisor: Supervisor, config: T, runtime: Runtime|None = None) -> dict[str, "Collector"]:
+        collectors = {}
+        for name, target in cls.targets(config, runtime).items():
+            collectors[name] = cls(target, config, runtime) # type: ignore # pylint: disable=too-many-function-args
+            supervisor.spawn(name, collectors[name].start)
+        return collectors
+
+    @classmethod
+    async def reconcile(cls, supervisor: Supervisor, collectors: dict[str, "Collector"], config: T, reloaded: T,
+                        runtime: Runtime|None = None) -> dict[str, "Collector"]:
+        """apply a reloaded configuration: start added targets, stop removed ones and
+        restart changed ones, the other collectors keep their sessions and caches"""
+        changed = [field for field in RUNTIME_FIELDS if getattr(config, field, None) != getattr(reloaded, field, None)]
+        if changed:
+            supervisor.logger.warning("changes of %s need a restart and are ignored", ", ".join(changed))
+        settings = {field for field in type(reloaded).model_fields if field not in (*RUNTIME_FIELDS, cls.targets_field)} # type: ignore
+        restart_all = any(getattr(config, field, None) != getattr(reloaded, field, None) for field in settings)
+        previous = {target.name: target for target in getattr(config, cls.targets_field)}
+        targets = cls.targets(reloaded, runtime)
+        collectors = dict(collectors)
+        stopped = []
+        for name, collector in list(collectors.items()):
+            if restart_all or name not in targets or targets[name] != previous.get(name):
+                stopped.append(name)
+                collector.stop()
+                del collectors[name]
+        await asyncio.gather(*(supervisor.retire(name) for name in stopped))
+        if runtime is not None and runtime.leases is not None:
+            for name in stopped:
+                await runtime.leases.release(name)
+                if name not in targets:
+                    runtime.leases.targets.discard(name)
+        for name, target in targets.items():
+            if name not in collectors:
+                collectors[name] = cls(target, reloaded, runtime) # type: ignore # pylint: disable=too-many-function-args
+                supervisor.spawn(name, collectors[name].start)
+        supervisor.logger.info("reloaded %s: %d stopped, %d running", cls.targets_field, len(stopped), len(collectors))
+        return collectors
+
+    def stop(self):
+        """let a daemon collector finish its cycle and return"""
+        self._stop.set()
 
     @abstractmethod
     async def collect(self) -> Tuple:
@@ -30,16 +117,174 @@ class Collector[T](ABC, Assurance):
     async def process(self, data: Tuple):
         pass
 
+    async def _open_sessions(self, stack: AsyncExitStack):
+        runtime = self.runtime
+        if runtime is None and self._resources is not None:
+            runtime = self.runtime = await self._resources.enter_async_context(Runtime(self.config)) # type: ignore
+        elif runtime is None:
+            runtime = await stack.enter_async_context(Runtime(self.config)) # type: ignore
+        self.elasticsearch = runtime.elasticsearch
+        self.einstein = runtime.einstein
+
     async def run(self):
+        current_target.set(self.target)
+        leases = self.runtime.leases if self.runtime is not None else None
+        if leases is not None and not await leases.claim(self.target):
+            self.logger.debug("%s: leased by another replica", self.target)
+            CYCLES.inc(result="leased")
+            return
+        started = asyncio.get_running_loop().time()
+        devices, result = 0, "failed"
+        with TRACER.trace("cycle", manager=self.target) as cycle:
+            try:
+                with STAGE_LATENCY.time(stage="collect"), TRACER.span("collect"):
+                    data = await self.collect()
+                devices = self.weight(data)
+                if leases is not None and not leases.holds(self.target):
+                    self.logger.warning("%s: lease lost while collecting, results dropped", self.target)
+                    result = "dropped"
+                    return
+                with STAGE_LATENCY.time(stage="process"), TRACER.span("process"):
+                    async with AsyncExitStack() as stack:
+                        await self._open_sessions(stack)
+                        self.customers = CustomerClient(self.elasticsearch, self.customer_snapshot)
+                        self.documents.begin_cycle()
+                        async with self.delta, self._bulk_failures():
+                            async with self.einstein.tracked():
+                                await self.process(data)
+                result = "ok"
+            except ValidationError as e:
+                error = self.pydantic_error(e)
+                self.runtime_error(str(error))
+                raise AssuranceException(error) from e
+            finally:
+                duration = asyncio.get_running_loop().time() - started
+                STAGE_LATENCY.observe(duration, stage="cycle")
+                CYCLES.inc(result=result)
+                if cycle is not None:
+                    cycle.set(devices=devices, result=result)
+                if self.runtime is not None:
+                    self.runtime.report(self.target, devices, duration, result == "ok")
+
+    def device_span(self, node_name: str) -> AbstractContextManager[Span|None]:
+        """trace span of the processing of one device"""
+        return TRACER.span("device", node_name=node_name, manager=self.target)
+
+    def weight(self, data: Tuple) -> int:
+        """devices collected in data, weights the assignment to worker processes"""
+        return sum(len(item) for item in data if isinstance(item, list))
+
+    async def start(self):
+        """run once, or periodically in daemon mode"""
+        if self.config.schedule.daemon: # type: ignore
+            await self.serve()
+        else:
+            await self.run()
+
+    async def _stopped(self, timeout: float) -> bool:
+        """sleep up to timeout seconds, True if the collector or the runtime is stopping"""
+        events = [self._stop] if self.runtime is None else [self._stop, self.runtime.stopping]
+        waiters = [asyncio.ensure_future(event.wait()) for event in events]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return any(event.is_set() for event in events)
+
+    async def serve(self):
+        """run every interval seconds until cancelled or stopping. Sessions stay open
+        between cycles, a cycle that overruns skips the runs it missed instead of stacking."""
+        jitter = self.config.schedule.jitter * self.interval # type: ignore
+        loop = asyncio.get_running_loop()
+        async with AsyncExitStack() as resources:
+            self._resources = resources
+            resources.push_async_callback(self._close_vendor_session)
+            if await self._stopped(random.uniform(0, jitter)): # spread the first cycles
+                return
+            due = loop.time()
+            while True:
+                started = loop.time()
+                try:
+                    await self.run()
+                    if self.runtime is not None and self.runtime.leases is not None:
+                        await self.runtime.leases.rebalance(self.target)
+                except Exception as e: # pylint: disable=broad-exception-caught
+                    self.logger.error("%s: cycle failed: %s", self.target, e)
+                self.logger.debug("%s: cycle took %.1fs", self.target, loop.time() - started)
+                due += self.interval
+                now = loop.time()
+                if now > due:
+                    skipped = math.ceil((now - due) / self.interval)
+                    self.logger.warning("%s: cycle overran by %.1fs, skipping %d run(s)", self.target, now - due, skipped)
+                    due += skipped * self.interval
+                    SKIPPED.inc(skipped, target=self.target)
+                if await self._stopped(max(0.0, due - now + random.uniform(-jitter, jitter))):
+                    return
+
+    @asynccontextmanager
+    async def vendor_session[S](self, factory: Callable[[], AbstractAsyncContextManager[S]]) -> AsyncIterator[S]:
+        """enter the session from factory. While serving it is kept open for the
+        next cycle, unless it failed, was idle longer than schedule.session_idle or
+        is older than schedule.session_max_age."""
+        if self._resources is None:
+            async with factory() as session:
+                yield session
+            return
+        loop = asyncio.get_running_loop()
+        schedule = self.config.schedule # type: ignore
+        if self._vendor is not None:
+            now = loop.time()
+            if now - self._vendor[3] > schedule.session_idle or now - self._vendor[2] > schedule.session_max_age:
+                await self._close_vendor_session()
+        if self._vendor is None:
+            stack = AsyncExitStack()
+            session = await stack.enter_async_context(factory())
+            self._vendor = (stack, session, loop.time(), loop.time())
+        stack, session, opened, _ = self._vendor
         try:
-            data = await self.collect()
-            async with ElasticsearchSession(self.config.elasticsearch.node) as self.elasticsearch: # type: ignore
-                async with EinsteinSession(self.config.einstein, self.elasticsearch) as self.einstein: # type: ignore
-                    await self.process(data)
-        except ValidationError as e:
-            error = self.pydantic_error(e)
-            self.runtime_error(str(error))
-            raise AssuranceException(error) from e
+            yield session
+        except BaseException:
+            await self._close_vendor_session()
+            raise
+        self._vendor = (stack, session, opened, loop.time())
+
+    async def _close_vendor_session(self):
+        if self._vendor is None:
+            return
+        stack, self._vendor = self._vendor[0], None
+        try:
+            await stack.aclose()
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.warning("%s: closing session failed: %s", self.target, e)
+
+    @asynccontextmanager
+    async def _bulk_failures(self):
+        """invalidate the delta of documents lost by the bulk writer, which is
+        drained at the end so the failures of the cycle are known"""
+        bulk = self.elasticsearch.bulk
+        if bulk is None:
+            yield
+            return
+        bulk.listeners.append(self.delta.failed)
+        try:
+            yield
+            await bulk.drain()
+        finally:
+            bulk.listeners.remove(self.delta.failed)
+
+    async def write_document(self, index_prefix: str, key: str, document: dict):
+        """write document to the monthly index, unless it is unchanged since the last heartbeat"""
+        digest = self.delta.changed(key, document)
+        if digest is None:
+            return
+        await self.elasticsearch.write_to_monthly(index_prefix, document)
+        self.delta.commit(key, digest, document if self.elasticsearch.bulk is not None else None)
+
+    async def write_service(self, index_prefix: str, key: str, service: BaseModel):
+        """write the service document in the configured layout"""
+        document = await self.documents.prepare(self.elasticsearch, index_prefix, service)
+        await self.write_document(index_prefix, key, document)
 
     def runtime_error(self, message: str):
         self.logger.error("Runtime Error: %s", message)
@@ -0,0 +1,2 @@
+from .delta import DeltaTracker
+from .types import Delta
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+from assurance.base.assurance import Assurance
+
+from .types import Delta
+
+
+class DeltaTracker(Assurance):
+    """Remembers a content hash per document key, so that unchanged documents
+    are only written again once per heartbeat interval. The state is persisted
+    to a local file per target to survive restarts."""
+
+    def __init__(self, config: Delta, target: str):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        filename = re.sub(r"[^A-Za-z0-9_.-]", "_", target)
+        self.path = os.path.join(config.state_dir, f"delta-{filename}.json")
+        self.state: dict[str, dict] = {}
+        self._buffered: dict[int, tuple[str, dict]] = {} # id(document) -> key, document of this cycle
+        self.written = 0
+        self.skipped = 0
+
+    async def __aenter__(self):
+        if self.config.enabled and not self.state:
+            self.state = await asyncio.to_thread(self._load)
+        self.written = 0
+        self.skipped = 0
+        self._buffered = {}
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._buffered = {}
+        if self.config.enabled:
+            await asyncio.to_thread(self._save)
+            self.logger.info("delta %s: %d written, %d unchanged", self.path, self.written, self.skipped)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning("ignore unreadable delta state %s: %s", self.path, e)
+            return {}
+
+    def _save(self):
+        os.makedirs(self.config.state_dir, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+    def _strip(self, document: dict, path: list[str]):
+        head, *rest = path
+        if head not in document:
+            return
+        if not rest:
+            del document[head]
+        elif isinstance(document[head], dict):
+            document[head] = dict(document[head])
+            self._strip(document[head], rest)
+
+    def digest(self, document: dict) -> str:
+        relevant = dict(document)
+        for field in self.config.exclude:
+            self._strip(relevant, field.split("."))
+        data = json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def changed(self, key: str, document: dict) -> str|None:
+        """returns the new digest if the document has to be written, None otherwise"""
+        if not self.config.enabled:
+            return ""
+        digest = self.digest(document)
+        last = self.state.get(key)
+        if last is not None and last["hash"] == digest and time.time() - last["written"] < self.config.heartbeat_interval:
+            self.skipped += 1
+            return None
+        return digest
+
+    def commit(self, key: str, digest: str, document: dict|None = None):
+        """document was written or, if given, buffered for a bulk request, see failed()"""
+        self.written += 1
+        if self.config.enabled:
+            self.state[key] = {"hash": digest, "written": time.time()}
+            if document is not None:
+                self._buffered[id(document)] = (key, document)
+
+    def invalidate(self, key: str):
+        """the document of key is written again in the next cycle"""
+        self.state.pop(key, None)
+
+    def failed(self, records: list[tuple[str, str|None, dict]]):
+        """bulk listener: invalidates the keys of buffered documents that were not written"""
+        for _, _, document in records:
+            if (buffered := self._buffered.get(id(document))) is not None and buffered[1] is document:
+                self.invalidate(buffered[0])
@@ -0,0 +1,13 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Delta(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = False
+    state_dir: str = "/var/tmp/assurance"
+    heartbeat_interval: int = 3600 # seconds, rewrite unchanged documents after this
+    # dotted paths ignored for change detection: the poll time and the resource
+    # utilization read every poll, these are refreshed by the heartbeat
+    exclude: List[str] = ["timestamp", "@timestamp", "device.cpu_usage", "device.memory_usage", "device.disk_usage"]
@@ -0,0 +1,3 @@
+from .documents import DocumentWriter
+from .templates import index_template
+from .types import Documents
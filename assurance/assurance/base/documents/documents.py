@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+from pydantic import BaseModel
+
+from assurance.elasticsearch import ElasticsearchSession
+
+from .templates import index_template
+from .types import Documents
+
+
+class DocumentWriter:
+    """Builds the device documents according to the configured layout. In the
+    normalized layout every referenced record is written once per cycle to a
+    reference index under a content derived id."""
+
+    def __init__(self, config: Documents):
+        self.config = config
+        self._references: set[str] = set()
+        self._templates: set[str] = set()
+
+    def begin_cycle(self):
+        self._references.clear()
+
+    @staticmethod
+    def reference_id(data: dict) -> str:
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    async def _install_template(self, elasticsearch: ElasticsearchSession, index_prefix: str, service: BaseModel):
+        if not self.config.install_template or index_prefix in self._templates:
+            return
+        name = f"{index_prefix.rstrip('_-')}-devices"
+        body = index_template(index_prefix, type(service), self.config.inline, self.config.layout == "normalized")
+        await elasticsearch.put_template(name, body)
+        self._templates.add(index_prefix)
+
+    async def prepare(self, elasticsearch: ElasticsearchSession, index_prefix: str, service: BaseModel) -> dict:
+        await self._install_template(elasticsearch, index_prefix, service)
+        if self.config.layout == "embedded":
+            return service.model_dump()
+        document = {}
+        for name in type(service).model_fields:
+            value = getattr(service, name)
+            if name in self.config.inline or not isinstance(value, BaseModel|None):
+                document[name] = value.model_dump() if isinstance(value, BaseModel) else value
+                continue
+            if value is None:
+                document[f"{name}_ref"] = None
+                continue
+            reference = value.model_dump()
+            ref_id = self.reference_id(reference)
+            document[f"{name}_ref"] = ref_id
+            if ref_id not in self._references:
+                await elasticsearch.write(elasticsearch.monthly(f"{self.config.reference_index}{name}_"), reference, ref_id)
+                self._references.add(ref_id)
+        return document
@@ -0,0 +1,60 @@
+import types
+import typing
+
+from pydantic import BaseModel
+
+# as dynamic mapping maps strings, so .keyword queries keep working
+_STRING = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+_TYPES = {
+    int: "long",
+    float: "double",
+    bool: "boolean",
+}
+
+
+def _field_mapping(annotation) -> dict:
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _field_mapping(args[0]) if len(args) == 1 else dict(_STRING)
+    if origin in (list, typing.List):
+        return _field_mapping(typing.get_args(annotation)[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _object_mapping(annotation)
+    if annotation is str:
+        return dict(_STRING)
+    if annotation in _TYPES:
+        return {"type": _TYPES[annotation]}
+    return {"type": "flattened"}
+
+
+def _object_mapping(model: type[BaseModel]) -> dict:
+    """extra='allow' models keep dynamic mapping for their undeclared fields"""
+    mapping: dict = {"properties": model_mapping(model)}
+    if model.model_config.get("extra") == "allow":
+        mapping["dynamic"] = True
+    return mapping
+
+
+def model_mapping(model: type[BaseModel]) -> dict:
+    return {name: _field_mapping(field.annotation) for name, field in model.model_fields.items()}
+
+
+def index_template(index_prefix: str, service: type[BaseModel], inline: typing.List[str], normalized: bool) -> dict:
+    """typed index template for the device indices, derived from the service model"""
+    properties: dict = {"@timestamp": {"type": "date"}}
+    for name, field in service.model_fields.items():
+        if name == "timestamp":
+            continue
+        if normalized and name not in inline:
+            properties[f"{name}_ref"] = {"type": "keyword"}
+        else:
+            properties[name] = _field_mapping(field.annotation)
+    return {
+        "index_patterns": [f"{index_prefix}*"],
+        "mappings": {
+            "dynamic": service.model_config.get("extra") == "allow",
+            "properties": properties
+        }
+    }
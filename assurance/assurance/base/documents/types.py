@@ -0,0 +1,13 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Documents(BaseModel):
+    model_config = ConfigDict(strict=True)
+    # embedded: full service document per device
+    # normalized: status/customer stored once in reference indices, device documents carry *_ref keys
+    layout: Literal["embedded", "normalized"] = "embedded"
+    inline: List[str] = ["timestamp", "device"] # service fields kept in the device document
+    reference_index: str = "nms_assurance-refs_" # monthly, e.g. nms_assurance-refs_status_2024.05
+    install_template: bool = False # put a typed index template for the device indices
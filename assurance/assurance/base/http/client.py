@@ -1,7 +1,10 @@
-import aiohttp
+from typing import TYPE_CHECKING
 
 from .types import HTTP
 
+if TYPE_CHECKING:
+    import aiohttp
+
 JSON_HEADERS = {
     "Content-Type": "application/json"
 }
@@ -19,11 +22,21 @@ class HttpClient:
         if self.config.api_token is not None:
             self.params[self.config.api_token.name] = self.config.api_token.value
 
+        self.session: "aiohttp.ClientSession|None" = None
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
     async def json_post(self, data: dict) -> dict:
-        async with aiohttp.ClientSession(**self.client_args) as session:
-            async with session.post(self.config.url,
-                                    json=data,
-                                    headers=JSON_HEADERS,
-                                    params=self.params,
-                                    **self.request_args) as response:
-                return await response.json()
+        """posts on one connection pool until close(), so the connection is reused"""
+        if self.session is None or self.session.closed:
+            import aiohttp # pylint: disable=import-outside-toplevel
+            self.session = aiohttp.ClientSession(**self.client_args)
+        async with self.session.post(self.config.url,
+                                     json=data,
+                                     headers=JSON_HEADERS,
+                                     params=self.params,
+                                     **self.request_args) as response:
+            return await response.json()
@@ -0,0 +1,9 @@
+from .lease import LeaseCoordinator
+from .store import (
+    ElasticsearchLeaseStore,
+    FileLeaseStore,
+    LeaseStore,
+    MemoryLeaseStore,
+    lease_store,
+)
+from .types import Lease
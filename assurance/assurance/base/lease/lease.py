@@ -0,0 +1,120 @@
+import asyncio
+import math
+import time
+from typing import Any
+
+from assurance.base.assurance import Assurance
+
+from .store import LeaseStore
+from .types import Lease
+
+
+class LeaseCoordinator(Assurance):
+    """Partitions targets between replicas running the same configuration. A
+    replica polls a target only while it holds its lease; held leases are
+    renewed in the background, expired ones (of a dead replica) can be claimed
+    by any replica below its fair share. The fair share follows the number of
+    replicas with a live heartbeat, so a new replica gets leases as the others
+    release their surplus after their next cycle."""
+
+    def __init__(self, config: Lease, store: LeaseStore):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.store = store
+        self.replica = config.replica
+        self.targets: set[str] = set()
+        self.held: dict[str, tuple[Any, float]] = {} # target -> version, expires
+        self.replicas = 1
+        self._heartbeat_version: Any = None
+        self._renewal: asyncio.Task|None = None
+
+    async def __aenter__(self):
+        await self._heartbeat()
+        self._renewal = asyncio.create_task(self._renew_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._renewal is not None:
+            self._renewal.cancel()
+            await asyncio.gather(self._renewal, return_exceptions=True)
+        for target in list(self.held):
+            await self.release(target)
+        if self._heartbeat_version is not None:
+            await self.store.delete(self._replica_key(), self._heartbeat_version)
+
+    def _replica_key(self) -> str:
+        return f"replica-{self.replica}"
+
+    def _record(self, kind: str, expires: float, **fields) -> dict:
+        return {"kind": kind, "owner": self.replica, "expires": expires, **fields}
+
+    def fair_share(self) -> int:
+        return math.ceil(len(self.targets) / max(1, self.replicas))
+
+    def holds(self, target: str) -> bool:
+        """False once the lease may have expired, e.g. while the store is unreachable"""
+        return target in self.held and self.held[target][1] > time.time()
+
+    async def claim(self, target: str) -> bool:
+        """True if this replica holds the lease of target, taking it over if possible"""
+        self.targets.add(target)
+        if self.holds(target):
+            return True
+        if len(self.held) >= self.fair_share() and target not in self.held:
+            return False
+        key = f"lease-{target}"
+        current = await self.store.get(key)
+        now = time.time()
+        if current is not None and current[0]["owner"] != self.replica and current[0]["expires"] > now:
+            return False
+        expires = now + self.config.ttl
+        version = await self.store.put(key, self._record("lease", expires, target=target),
+                                       None if current is None else current[1])
+        if version is None:
+            self.held.pop(target, None)
+            return False # claimed concurrently by another replica
+        self.held[target] = (version, expires)
+        if current is not None and current[0]["owner"] != self.replica:
+            self.logger.info("%s took over %s from %s", self.replica, target, current[0]["owner"])
+        return True
+
+    async def release(self, target: str):
+        held = self.held.pop(target, None)
+        if held is not None:
+            await self.store.delete(f"lease-{target}", held[0])
+
+    async def rebalance(self, target: str):
+        """release target if this replica holds more than its fair share"""
+        if target in self.held and len(self.held) > self.fair_share():
+            self.logger.info("%s releases %s (%d held, fair share %d)", self.replica, target,
+                             len(self.held), self.fair_share())
+            await self.release(target)
+
+    async def _heartbeat(self):
+        key = self._replica_key()
+        if self._heartbeat_version is None:
+            current = await self.store.get(key)
+            self._heartbeat_version = None if current is None else current[1]
+        self._heartbeat_version = await self.store.put(key, self._record("replica", time.time() + self.config.ttl),
+                                                       self._heartbeat_version)
+        now = time.time()
+        self.replicas = sum(1 for record in await self.store.scan("replica") if record["expires"] > now) or 1
+
+    async def _renew(self):
+        for target, (version, _) in list(self.held.items()):
+            expires = time.time() + self.config.ttl
+            version = await self.store.put(f"lease-{target}", self._record("lease", expires, target=target), version)
+            if version is None:
+                self.logger.warning("%s lost the lease of %s", self.replica, target)
+                self.held.pop(target, None)
+            else:
+                self.held[target] = (version, expires)
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.config.renew_interval)
+            try:
+                await self._heartbeat()
+                await self._renew()
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error("lease renewal failed: %s", e)
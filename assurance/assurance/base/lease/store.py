@@ -0,0 +1,158 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, List, Tuple
+
+from assurance.elasticsearch import ElasticsearchSession
+
+from .types import Lease
+
+
+class LeaseStore(ABC):
+    """Records with compare-and-set semantics. get() returns the record with an
+    opaque version, put() and delete() only succeed if the version still matches
+    (version None creates a record that must not exist yet). put() returns the
+    new version, None on conflict."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Tuple[dict, Any]|None:
+        pass
+
+    @abstractmethod
+    async def put(self, key: str, record: dict, version: Any) -> Any:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str, version: Any) -> bool:
+        pass
+
+    @abstractmethod
+    async def scan(self, kind: str) -> List[dict]:
+        pass
+
+
+class MemoryLeaseStore(LeaseStore):
+    """for tests and single process setups"""
+
+    def __init__(self):
+        self.records: dict[str, Tuple[dict, int]] = {}
+
+    async def get(self, key):
+        return self.records.get(key)
+
+    async def put(self, key, record, version):
+        current = self.records.get(key)
+        if (current is None) != (version is None) or (current is not None and current[1] != version):
+            return None
+        self.records[key] = (record, 0 if current is None else current[1] + 1)
+        return self.records[key][1]
+
+    async def delete(self, key, version):
+        current = self.records.get(key)
+        if current is None or current[1] != version:
+            return False
+        del self.records[key]
+        return True
+
+    async def scan(self, kind):
+        return [record for record, _ in self.records.values() if record.get("kind") == kind]
+
+
+class FileLeaseStore(LeaseStore):
+    """one JSON file per record, changes are serialized by an flock on the directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".json")
+
+    def _locked(self, function, *args):
+        with open(os.path.join(self.directory, ".lock"), "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                return function(*args)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self, path: str) -> Tuple[dict, int]|None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return data["record"], data["version"]
+
+    def _put(self, key: str, record: dict, version: int|None) -> int|None:
+        path = self._path(key)
+        current = self._read(path)
+        if (current is None) != (version is None) or (current is not None and current[1] != version):
+            return None
+        new_version = 0 if current is None else current[1] + 1
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"record": record, "version": new_version}, f)
+        os.replace(tmp, path)
+        return new_version
+
+    def _delete(self, key: str, version: int) -> bool:
+        path = self._path(key)
+        current = self._read(path)
+        if current is None or current[1] != version:
+            return False
+        os.remove(path)
+        return True
+
+    def _scan(self, kind: str) -> List[dict]:
+        records = [self._read(path) for path in glob.glob(os.path.join(self.directory, "*.json"))]
+        return [record for record, _ in filter(None, records) if record.get("kind") == kind]
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._locked, self._read, self._path(key))
+
+    async def put(self, key, record, version):
+        return await asyncio.to_thread(self._locked, self._put, key, record, version)
+
+    async def delete(self, key, version):
+        return await asyncio.to_thread(self._locked, self._delete, key, version)
+
+    async def scan(self, kind):
+        return await asyncio.to_thread(self._locked, self._scan, kind)
+
+
+class ElasticsearchLeaseStore(LeaseStore):
+    """documents in index, versioned by seq_no/primary_term"""
+
+    def __init__(self, elasticsearch: ElasticsearchSession, index: str):
+        self.elasticsearch = elasticsearch
+        self.index = index
+
+    async def get(self, key):
+        return await self.elasticsearch.get_versioned(self.index, key)
+
+    async def put(self, key, record, version):
+        return await self.elasticsearch.put_versioned(self.index, key, record, version)
+
+    async def delete(self, key, version):
+        return await self.elasticsearch.delete_versioned(self.index, key, version)
+
+    async def scan(self, kind):
+        hits = []
+        async for hit in self.elasticsearch.scan(self.index, {"term": {"kind": kind}}):
+            hits.append(hit)
+        return hits
+
+
+def lease_store(config: Lease, elasticsearch: ElasticsearchSession) -> LeaseStore:
+    match config.store:
+        case "elasticsearch":
+            return ElasticsearchLeaseStore(elasticsearch, config.index)
+        case "file":
+            return FileLeaseStore(config.directory)
+        case _:
+            return MemoryLeaseStore()
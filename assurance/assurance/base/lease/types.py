@@ -0,0 +1,16 @@
+import os
+import socket
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Lease(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = False
+    store: Literal["elasticsearch", "file", "memory"] = "elasticsearch"
+    index: str = "nms_assurance-leases" # elasticsearch store
+    directory: str = "/var/tmp/assurance/leases" # file store, shared by the replicas of one host
+    ttl: float = 90.0 # seconds a lease or replica heartbeat is valid without renewal
+    renew_interval: float = 30.0 # seconds
+    replica: str = f"{socket.gethostname()}-{os.getpid()}"
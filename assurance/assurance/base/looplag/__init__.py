@@ -0,0 +1,2 @@
+from .monitor import LagMonitor
+from .types import LoopMonitor
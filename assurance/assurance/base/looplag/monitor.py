@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from assurance.base.assurance import Assurance
+from assurance.base.metrics import REGISTRY
+
+from .types import LoopMonitor
+
+LAG = REGISTRY.histogram("assurance_event_loop_lag_seconds", "delay of the event loop heartbeat",
+                         buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LAG_QUANTILES = REGISTRY.gauge("assurance_event_loop_lag_quantile_seconds", "event loop lag percentiles of the window",
+                               ("quantile",))
+BLOCKED = REGISTRY.counter("assurance_event_loop_blocked_total", "stalls of the event loop longer than the threshold")
+
+
+class LagMonitor(Assurance):
+    """A heartbeat task measures how late the event loop wakes it up. A watchdog
+    thread notices a heartbeat overdue by more than threshold while the loop is
+    still blocked and logs the stack of the loop thread, i.e. of the blocking
+    callback."""
+
+    def __init__(self, config: LoopMonitor):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.enabled = config.enabled or os.getenv("ASSURANCE_LOOP_MONITOR") is not None
+        self.samples: deque[float] = deque(maxlen=max(1, int(config.window / config.interval)))
+        self._beat = 0.0 # monotonic time of the last heartbeat, written by the loop thread only
+        self._reported = 0.0 # heartbeat of the stall whose stack was logged
+        self._loop_thread = 0
+        self._heartbeat: asyncio.Task|None = None
+        self._watchdog: threading.Thread|None = None
+        self._stop = threading.Event()
+
+    async def __aenter__(self):
+        if not self.enabled:
+            return self
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        for quantile in (0.5, 0.9, 0.99, 1.0):
+            LAG_QUANTILES.register(lambda q=quantile: self.percentile(q), quantile=f"{quantile:g}")
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        self._watchdog = threading.Thread(target=self._watchdog_loop, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._heartbeat is None:
+            return
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._heartbeat = None
+        self._stop.set()
+        await asyncio.to_thread(self._watchdog.join) # type: ignore
+        self._watchdog = None
+        if self.samples:
+            self.logger.info("event loop lag p50 %.1fms p99 %.1fms max %.1fms", self.percentile(0.5) * 1000,
+                             self.percentile(0.99) * 1000, self.percentile(1.0) * 1000)
+
+    def percentile(self, quantile: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.config.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - self._beat - self.config.interval)
+            self._beat = now
+            self.samples.append(lag)
+            LAG.observe(lag)
+            if lag > self.config.threshold:
+                BLOCKED.inc()
+                self.logger.warning("event loop was blocked for %.3fs", lag)
+
+    def _watchdog_loop(self):
+        while not self._stop.wait(min(self.config.interval, self.config.threshold / 2)):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.config.interval
+            if overdue <= self.config.threshold or beat == self._reported:
+                continue
+            self._reported = beat
+            frame = sys._current_frames().get(self._loop_thread) # pylint: disable=protected-access
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.logger.warning("event loop blocked for %.3fs so far in:\n%s", overdue, stack)
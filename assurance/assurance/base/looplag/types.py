@@ -0,0 +1,9 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class LoopMonitor(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = False # also enabled by the environment variable ASSURANCE_LOOP_MONITOR
+    interval: float = 0.1 # seconds between heartbeats of the event loop
+    threshold: float = 0.25 # seconds, a heartbeat later than this logs the stack of the blocking code
+    window: float = 60.0 # seconds of lag samples for the percentile gauges
@@ -1,2 +1,3 @@
 from .main import Main
-from .types import Config
+from .runtime import Runtime
+from .types import Config, Schedule
@@ -1,25 +1,92 @@
+import argparse
 import asyncio
 import glob
 import logging
 import os
+import signal
+import sys
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
 
 import yaml
 from dotenv import load_dotenv
 
+from assurance.base.supervisor import Supervision
+from assurance.base.workers import Shard, WorkerPool, Workers
+
+from .runtime import Runtime
+from .types import Config
+
 
 class Main(ABC):
 
     def __init__(self):
         self._logging_config()
         self.logger = logging.getLogger(__name__)
+        self.args = self.argument_parser().parse_args([])
+        self.shard: Shard|None = None # set in worker processes
+        self.stopping = asyncio.Event() # set by SIGTERM/SIGINT
 
     @abstractmethod
     async def handler(self):
         pass
 
+    def argument_parser(self) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--daemon", action="store_true",
+                            help="keep running and collect every schedule.interval seconds")
+        parser.add_argument("--workers", type=int, metavar="N",
+                            help="distribute the managers/devices over N worker processes")
+        return parser
+
     def run(self):
-        asyncio.run(self.handler())
+        """the handler may return an exit code"""
+        self.args = self.argument_parser().parse_args()
+        raw = self.read_config()
+        workers = Workers(**raw.get("workers", {}))
+        if workers.count > 1:
+            grace = Supervision(**raw.get("supervision", {})).grace_period
+            sys.exit(WorkerPool(workers, type(self).__name__.lower(), self._work, grace).run())
+        sys.exit(asyncio.run(self._serve((signal.SIGTERM, signal.SIGINT))) or 0)
+
+    def _work(self, shard: Shard):
+        """entry point of a worker process, the parent forwards SIGINT as SIGTERM"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._logging_config()
+        self.shard = shard
+        sys.exit(asyncio.run(self._serve((signal.SIGTERM,))) or 0)
+
+    async def _serve(self, signals: tuple[signal.Signals, ...]):
+        """run the handler: the first signal sets stopping, so no new collections
+        are started and the running ones get the grace period, the second one
+        cancels the handler"""
+        loop = asyncio.get_running_loop()
+        handler = asyncio.current_task()
+
+        def stop(name: str):
+            if self.stopping.is_set():
+                self.logger.warning("%s received again, cancelling", name)
+                handler.cancel() # type: ignore
+                return
+            self.logger.info("%s received, stopping", name)
+            self.stopping.set()
+
+        for sig in signals:
+            loop.add_signal_handler(sig, stop, sig.name)
+        try:
+            return await self.handler()
+        except asyncio.CancelledError:
+            if not self.stopping.is_set():
+                raise
+            self.logger.error("cancelled before shutdown completed")
+            return 1
+        finally:
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+
+    def runtime(self, config: Config) -> Runtime:
+        """runtime limited to the shard of this process, stopped by signals"""
+        return Runtime(config, self.shard, self.stopping)
 
     def _logging_config(self):
         formatstr = "%(name)s %(levelname)s %(message)s"
@@ -32,6 +99,42 @@ class Main(ABC):
                 if not v.name.startswith('assurance'):
                     v.disabled = True
 
+    def _config_stamp(self) -> list[tuple[str, int, int]]:
+        configdir = os.getenv('ASSURANCE_CONFIG_DIR', "")
+        stamp = []
+        for file in sorted(glob.glob(f"{configdir}/*.yaml")):
+            try:
+                stat = os.stat(file)
+            except FileNotFoundError:
+                continue
+            stamp.append((file, stat.st_mtime_ns, stat.st_size))
+        return stamp
+
+    async def watch_config[C](self, parse: Callable[[dict], C], interval: float) -> AsyncIterator[C]:
+        """yields parse(read_config()) whenever a *.yaml of ASSURANCE_CONFIG_DIR changed,
+        until stopping. Invalid edits are logged and skipped, the last good config stays."""
+        if interval <= 0:
+            await self.stopping.wait()
+            return
+        stamp = self._config_stamp()
+        while True:
+            try:
+                await asyncio.wait_for(self.stopping.wait(), interval)
+                return
+            except TimeoutError:
+                pass
+            current = self._config_stamp()
+            if current == stamp:
+                continue
+            stamp = current
+            try:
+                config = parse(self.read_config())
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error("invalid configuration, keeping the last good one: %s", e)
+                continue
+            self.logger.info("configuration changed, reloading")
+            yield config
+
     def read_config(self) -> dict:
         load_dotenv()
         configdir = os.getenv('ASSURANCE_CONFIG_DIR')
@@ -46,4 +149,8 @@ class Main(ABC):
             with open(file, "r", encoding="utf-8") as f:
                 plain_config = f.read().format(**filtered_envs)
                 config = {**config, **yaml.safe_load(plain_config)}
+        if self.args.daemon:
+            config["schedule"] = {**config.get("schedule", {}), "daemon": True}
+        if self.args.workers is not None:
+            config["workers"] = {**config.get("workers", {}), "count": self.args.workers}
         return config
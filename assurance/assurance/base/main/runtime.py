@@ -0,0 +1,72 @@
+import asyncio
+from contextlib import AsyncExitStack
+from typing import List
+
+from assurance.base.assurance import Assurance
+from assurance.base.lease import LeaseCoordinator, lease_store
+from assurance.base.looplag import LagMonitor
+from assurance.base.metrics import MetricsExporter
+from assurance.base.tracing import TraceExporter
+from assurance.base.workers import Shard
+from assurance.customer import CustomerSnapshot
+from assurance.einstein import EinsteinSession
+from assurance.elasticsearch import ElasticsearchSession
+from assurance.sink import document_sink, message_sink
+
+from .types import Config
+
+
+class Runtime(Assurance):
+    """Process wide sink sessions and caches, shared by all collectors."""
+
+    def __init__(self, config: Config, shard: Shard|None = None, stopping: asyncio.Event|None = None):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.shard = shard
+        self.stopping = stopping or asyncio.Event() # no new collections once set
+        self.elasticsearch = ElasticsearchSession(config.elasticsearch.node)
+        worker = shard.index if shard is not None else None
+        self.documents = document_sink(config.output.documents, self.elasticsearch, config.output.spool, worker)
+        self.messages = message_sink(config.output.messages, config.einstein.kafka, config.output.spool, worker)
+        self.einstein = EinsteinSession(config.einstein, self.elasticsearch, self.messages)
+        self.customer_snapshot = CustomerSnapshot(config.customer)
+        self.leases: LeaseCoordinator|None = None
+        if config.lease.enabled:
+            lease = config.lease
+            if shard is not None: # every worker process is a replica of its own
+                lease = lease.model_copy(update={"replica": f"{lease.replica}-w{shard.index}"})
+            self.leases = LeaseCoordinator(lease, lease_store(lease, self.elasticsearch))
+        self.metrics = MetricsExporter(config.metrics, config.schedule.daemon, worker)
+        self.traces = TraceExporter(config.tracing, worker)
+        self.loop_monitor = LagMonitor(config.loop_monitor)
+        self._stack = AsyncExitStack()
+
+    async def __aenter__(self):
+        await self._stack.enter_async_context(self.metrics) # written last in one-shot mode
+        await self._stack.enter_async_context(self.traces)
+        await self._stack.enter_async_context(self.loop_monitor)
+        await self._stack.enter_async_context(self.elasticsearch)
+        await self._stack.enter_async_context(self.documents)
+        self.elasticsearch.output = self.documents
+        if self.leases is not None:
+            await self._stack.enter_async_context(self.leases) # released after the last alert was sent
+        await self._stack.enter_async_context(self.einstein)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._stack.__aexit__(exc_type, exc, tb)
+
+    def partition[M](self, targets: List[M]) -> List[M]:
+        """the managers/devices (anything with a name) run by this process. With
+        leases enabled all of them, they are claimed per cycle and the fair share
+        is computed over the full set, so worker processes are not sharded."""
+        if self.shard is not None and self.leases is None:
+            owned = set(self.shard.partition([target.name for target in targets])) # type: ignore
+            targets = [target for target in targets if target.name in owned] # type: ignore
+        if self.leases is not None:
+            self.leases.targets.update(target.name for target in targets) # type: ignore
+        return list(targets)
+
+    def report(self, target: str, devices: int, duration: float, ok: bool):
+        if self.shard is not None:
+            self.shard.report(target, devices, duration, ok)
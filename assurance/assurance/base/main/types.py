@@ -1,8 +1,28 @@
 from pydantic import BaseModel, ConfigDict
 
+from assurance.base.delta import Delta
+from assurance.base.documents import Documents
+from assurance.base.lease import Lease
+from assurance.base.looplag import LoopMonitor
+from assurance.base.metrics import Metrics
+from assurance.base.supervisor import Supervision
+from assurance.base.tracing import Tracing
+from assurance.base.workers import Workers
+from assurance.customer import CustomerDirectory
 from assurance.einstein import Einstein
 from assurance.elasticsearch import Elasticsearch
 from assurance.mapper import Mapping
+from assurance.sink import Output
+
+
+class Schedule(BaseModel):
+    model_config = ConfigDict(strict=True)
+    daemon: bool = False # run collectors periodically instead of once, also --daemon
+    interval: float = 300.0 # seconds between cycles, per manager/device overridable
+    jitter: float = 0.1 # fraction of the interval added to or subtracted from each sleep
+    session_idle: float = 360.0 # reuse vendor sessions idle for at most this many seconds, above interval plus jitter
+    session_max_age: float = 900.0 # re-login vendor sessions older than this, below token lifetimes (BIG-IP: 1200s)
+    reload_interval: float = 10.0 # seconds between checks of the config directory, 0 disables
 
 
 class Config(BaseModel):
@@ -11,3 +31,14 @@ class Config(BaseModel):
     elasticsearch: Elasticsearch
     einstein: Einstein
     mapping: Mapping|None = None
+    delta: Delta = Delta()
+    customer: CustomerDirectory = CustomerDirectory()
+    documents: Documents = Documents()
+    output: Output = Output()
+    schedule: Schedule = Schedule()
+    workers: Workers = Workers()
+    lease: Lease = Lease()
+    supervision: Supervision = Supervision()
+    metrics: Metrics = Metrics()
+    tracing: Tracing = Tracing()
+    loop_monitor: LoopMonitor = LoopMonitor()
@@ -0,0 +1,4 @@
+from .common import ELASTICSEARCH_LATENCY, STAGE_LATENCY, VENDOR_ERRORS, VENDOR_LATENCY
+from .exporter import MetricsExporter
+from .metrics import REGISTRY, Counter, Gauge, Histogram, Registry, current_target
+from .types import Metrics
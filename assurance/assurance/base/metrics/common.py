@@ -0,0 +1,12 @@
+from .metrics import REGISTRY
+
+# metrics recorded by more than one module
+
+STAGE_LATENCY = REGISTRY.histogram("assurance_stage_seconds", "duration of the collect and process stages, customer lookups and the whole cycle",
+                                   ("stage", "target"))
+VENDOR_LATENCY = REGISTRY.histogram("assurance_vendor_request_seconds", "vendor API request latency",
+                                    ("vendor", "endpoint", "target"))
+VENDOR_ERRORS = REGISTRY.counter("assurance_vendor_request_errors_total", "failed vendor API requests",
+                                 ("vendor", "endpoint", "target"))
+ELASTICSEARCH_LATENCY = REGISTRY.histogram("assurance_elasticsearch_request_seconds", "elasticsearch request latency",
+                                           ("operation",))
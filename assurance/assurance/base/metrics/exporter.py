@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+
+from assurance.base.assurance import Assurance
+
+from .metrics import REGISTRY, Registry
+from .types import Metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsExporter(Assurance):
+    """Serves the registry on http://host:port/metrics while the daemon runs, a
+    one-shot run writes it to path at exit instead. Worker processes listen on
+    port + 1 + worker index, write metrics-<index>.prom and label every series
+    with worker="<index>"."""
+
+    def __init__(self, config: Metrics, daemon: bool, worker: int|None = None, registry: Registry = REGISTRY):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.daemon = daemon
+        self.worker = worker
+        self.registry = registry
+        self.port = config.port if worker is None else config.port + 1 + worker
+        if worker is not None:
+            registry.labels["worker"] = str(worker)
+        self._server: asyncio.Server|None = None
+
+    async def __aenter__(self):
+        self.registry.set_buckets(tuple(self.config.buckets))
+        if self.config.enabled and self.daemon:
+            try:
+                self._server = await asyncio.start_server(self._handle, self.config.host, self.port)
+                self.logger.info("metrics on http://%s:%d/metrics", self.config.host, self.port)
+            except OSError as e:
+                self.logger.error("metrics endpoint %s:%d not started: %s", self.config.host, self.port, e)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.config.enabled and not self.daemon and self.config.path:
+            self.dump()
+
+    def dump(self):
+        """atomically replace the metrics file, scrapers never see a partial one"""
+        path = self.config.path
+        if self.worker is not None: # the node_exporter textfile collector only reads *.prom
+            root, extension = os.path.splitext(path)
+            path = f"{root}-{self.worker}{extension or '.prom'}"
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".metrics-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.error("metrics not written to %s: %s", path, e)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            method, target = (request.split(b"\r\n", 1)[0].split(b" ") + [b"", b""])[:2]
+            if method != b"GET":
+                status, body = "405 Method Not Allowed", b""
+            elif target.split(b"?", 1)[0] not in (b"/metrics", b"/"):
+                status, body = "404 Not Found", b""
+            else:
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,161 @@
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+# the collector target (manager/device) of the running cycle, default of the "target" label
+current_target: ContextVar[str] = ContextVar("current_target", default="")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if "target" in self.labels and "target" not in labels:
+            labels["target"] = current_target.get()
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self, names: tuple[str, ...], const: tuple[str, ...]) -> Iterator[str]: # pylint: disable=unused-argument
+        """names: the label names followed by the names of the constant labels with the values const"""
+        return iter(())
+
+    def render(self, const: dict[str, str]|None = None) -> str:
+        const = const or {}
+        return "".join([f"# HELP {self.name} {self.documentation}\n", f"# TYPE {self.name} {self.kind}\n",
+                        *(f"{sample}\n" for sample in self.samples(self.labels + tuple(const), tuple(const.values())))])
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self, names, const):
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels(names, key + const)} {value:g}"
+
+
+class Gauge(Metric):
+    """set explicitly or read from callbacks at render time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+        self.callbacks: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        self.values[self._key(labels)] = value
+
+    def register(self, callback: Callable[[], float], **labels: str):
+        self.callbacks[self._key(labels)] = callback
+
+    def samples(self, names, const):
+        values = {**self.values, **{key: callback() for key, callback in self.callbacks.items()}}
+        for key, value in values.items():
+            yield f"{self.name}{_labels(names, key + const)} {value:g}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...]|None = None):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self.configurable = buckets is None # follows metrics.buckets
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {} # bucket counts, [sum, count]
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        if key not in self.values:
+            self.values[key] = ([0] * len(self.buckets), [0.0, 0])
+        counts, totals = self.values[key]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(counts):
+            counts[index] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        """observe the duration of the block, also if it raises"""
+        labels = {**labels}
+        self._key(labels) # bind the target of the caller's context
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self, names, const):
+        for key, (counts, (total, count)) in self.values.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = 'le="%g"' % bound
+                yield f"{self.name}_bucket{_labels(names, key + const, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(names, key + const, le)} {count}"
+            yield f"{self.name}_sum{_labels(names, key + const)} {total:g}"
+            yield f"{self.name}_count{_labels(names, key + const)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.labels: dict[str, str] = {} # added to every series, e.g. the worker index
+
+    def _add[M: Metric](self, metric: M) -> M:
+        existing = self.metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric) or existing.labels != metric.labels:
+            raise ValueError(f"metric {metric.name} registered twice with a different type or labels")
+        return existing # type: ignore
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...]|None = None) -> Histogram:
+        return self._add(Histogram(name, documentation, labels, buckets))
+
+    def set_buckets(self, buckets: tuple[float, ...]):
+        """change the buckets of the histograms without own ones, before anything was observed"""
+        for metric in self.metrics.values():
+            if isinstance(metric, Histogram) and metric.configurable and not metric.values:
+                metric.buckets = tuple(sorted(buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        return "".join(metric.render(self.labels) for metric in self.metrics.values())
+
+
+REGISTRY = Registry()
@@ -0,0 +1,12 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Metrics(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    host: str = "127.0.0.1" # daemon mode: /metrics endpoint in Prometheus text format
+    port: int = 9464 # worker processes listen on port + 1 + worker index
+    path: str|None = "/var/tmp/assurance/metrics.prom" # one-shot mode: written at exit, e.g. for the node_exporter textfile collector, workers write metrics-<index>.prom
+    buckets: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0] # seconds
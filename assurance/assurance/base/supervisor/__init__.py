@@ -0,0 +1,2 @@
+from .supervisor import FAILURE_EXIT_CODE, Supervisor
+from .types import CollectorStatus, Supervision
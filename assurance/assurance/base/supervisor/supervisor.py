@@ -0,0 +1,131 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from assurance.base.assurance import Assurance
+
+from .types import CollectorStatus, Supervision
+
+FAILURE_EXIT_CODE = 2
+
+
+class Supervisor(Assurance):
+    """Runs each collector as an isolated task: an exception is accounted to
+    that collector only, the others keep running. Failed collectors are
+    optionally restarted with exponential backoff. After all collectors
+    finished, exit_code is FAILURE_EXIT_CODE if more than failure_threshold
+    of them failed. Once stopping is set, no collector is restarted and the
+    running ones are cancelled after the grace period."""
+
+    def __init__(self, config: Supervision, stopping: asyncio.Event|None = None):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.stopping = stopping or asyncio.Event()
+        self.status: dict[str, CollectorStatus] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._named: dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc is not None:
+                for task in self._tasks:
+                    task.cancel()
+            stopping = asyncio.create_task(self.stopping.wait())
+            while self._tasks and not stopping.done():
+                await asyncio.wait({*self._tasks, stopping}, return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            if self._tasks:
+                await self._drain()
+        except asyncio.CancelledError:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            raise
+        finally:
+            self.report()
+
+    async def _drain(self):
+        self.logger.info("stopping: %d collectors get %.0fs to finish", len(self._tasks), self.config.grace_period)
+        _, pending = await asyncio.wait(self._tasks, timeout=self.config.grace_period)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def spawn(self, name: str, factory: Callable[[], Awaitable]):
+        """run factory() as collector name, factory is called again for a restart"""
+        self.status[name] = CollectorStatus(name=name)
+        task = asyncio.create_task(self._supervise(self.status[name], factory), name=name)
+        self._tasks.add(task)
+        self._named[name] = task
+        task.add_done_callback(self._tasks.discard)
+
+    async def retire(self, name: str):
+        """wait up to the grace period for collector name to return, then cancel it.
+        It is no longer accounted for the exit code."""
+        task = self._named.pop(name, None)
+        self.status.pop(name, None)
+        if task is None:
+            return
+        _, pending = await asyncio.wait({task}, timeout=self.config.grace_period)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _supervise(self, status: CollectorStatus, factory: Callable[[], Awaitable]):
+        loop = asyncio.get_running_loop()
+        while True:
+            status.state = "running"
+            status.runs += 1
+            started = loop.time()
+            try:
+                await factory()
+                status.state = "done"
+                return
+            except asyncio.CancelledError:
+                status.state = "cancelled"
+                raise
+            except Exception as e: # pylint: disable=broad-exception-caught
+                status.failures += 1
+                status.error = str(e) or type(e).__name__
+                self.logger.error("%s failed: %s", status.name, status.error, exc_info=True)
+            finally:
+                status.duration = loop.time() - started
+            if not self.config.restart or status.failures > self.config.max_restarts or self.stopping.is_set():
+                status.state = "failed"
+                return
+            status.state = "restarting"
+            backoff = min(self.config.max_backoff, self.config.backoff * 2 ** (status.failures - 1))
+            self.logger.info("%s restarts in %.0fs", status.name, backoff)
+            try:
+                await asyncio.wait_for(self.stopping.wait(), backoff)
+                status.state = "failed" # stopped while waiting for the restart
+                return
+            except TimeoutError:
+                pass
+
+    @property
+    def failed(self) -> list[str]:
+        return [name for name, status in self.status.items() if status.state == "failed"]
+
+    @property
+    def exit_code(self) -> int:
+        if self.status and len(self.failed) / len(self.status) > self.config.failure_threshold:
+            return FAILURE_EXIT_CODE
+        return 0
+
+    def report(self):
+        for status in self.status.values():
+            if status.state == "failed":
+                self.logger.error("%s: failed after %d run(s): %s", status.name, status.runs, status.error)
+            elif status.state == "cancelled":
+                self.logger.warning("%s: cancelled at shutdown, the running collection was dropped", status.name)
+            elif status.failures:
+                self.logger.warning("%s: %s after %d failure(s), last: %s", status.name, status.state,
+                                    status.failures, status.error)
+            else:
+                self.logger.debug("%s: %s in %.1fs", status.name, status.state, status.duration)
+        if self.status:
+            cancelled = sum(1 for status in self.status.values() if status.state == "cancelled")
+            self.logger.info("%d collectors, %d failed, %d cancelled", len(self.status), len(self.failed), cancelled)
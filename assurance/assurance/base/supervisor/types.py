@@ -0,0 +1,22 @@
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Supervision(BaseModel):
+    model_config = ConfigDict(strict=True)
+    restart: bool = False # run a failed collector again
+    max_restarts: int = 3 # per collector, then it is given up
+    backoff: float = 5.0 # seconds before the first restart, doubled per restart
+    max_backoff: float = 300.0
+    failure_threshold: float = 0.0 # fraction of failed collectors tolerated for exit code 0
+    grace_period: float = 30.0 # seconds running collections may finish after SIGTERM
+
+
+class CollectorStatus(BaseModel):
+    name: str
+    state: Literal["running", "restarting", "done", "failed", "cancelled"] = "running"
+    runs: int = 0
+    failures: int = 0
+    error: str|None = None
+    duration: float = 0.0 # seconds of the last run
@@ -0,0 +1,3 @@
+from .exporter import JsonlExporter, TraceExporter, otlp_payload
+from .tracer import TRACER, Span, Tracer
+from .types import Tracing
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+from typing import TYPE_CHECKING, Any
+
+from assurance.base.assurance import Assurance
+
+from .tracer import TRACER, Tracer
+from .types import Tracing
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class JsonlExporter:
+    """appends one span per line, rotating the file at max_bytes"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, spans: list[dict]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[dict], service_name: str) -> dict:
+    """ExportTraceServiceRequest in the OTLP/HTTP JSON encoding"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{
+            "scope": {"name": "assurance"},
+            "spans": [{
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                **({"parentSpanId": span["parent_id"]} if span["parent_id"] else {}),
+                "name": span["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(span["start"]),
+                "endTimeUnixNano": str(span["end"]),
+                "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span["attributes"].items()],
+                "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+            } for span in spans],
+        }],
+    }]}
+
+
+class TraceExporter(Assurance):
+    """Collects the traces finished by the tracer and writes them every
+    flush_interval seconds off the event loop, to the JSONL file and, if
+    configured, to an OTLP/HTTP endpoint."""
+
+    def __init__(self, config: Tracing, worker: int|None = None, tracer: Tracer = TRACER):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.tracer = tracer
+        self.file: JsonlExporter|None = None
+        if config.path:
+            path = config.path if worker is None else f"{config.path}.w{worker}"
+            self.file = JsonlExporter(path, config.max_bytes, config.backups)
+        self._pending: list[dict] = []
+        self._flusher: asyncio.Task|None = None
+        self._session: "aiohttp.ClientSession|None" = None
+
+    def export(self, spans: list[dict]):
+        if len(self._pending) < self.config.max_spans * 10: # bounded if the exports are stuck
+            self._pending.extend(spans)
+
+    async def __aenter__(self):
+        if self.config.enabled and (self.file is not None or self.config.otlp_endpoint):
+            self.tracer.configure(self.config, [self.export])
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        self.tracer.configure(self.config, [])
+        await self.flush()
+        if self._session is not None:
+            await self._session.close()
+            self._session: "aiohttp.ClientSession|None" = None
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.config.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        spans, self._pending = self._pending, []
+        if self.file is not None:
+            try:
+                await asyncio.to_thread(self.file.write, spans)
+            except OSError as e:
+                self.logger.error("%d spans not written to %s: %s", len(spans), self.file.path, e)
+        if self.config.otlp_endpoint:
+            await self._post(spans)
+
+    async def _post(self, spans: list[dict]):
+        import aiohttp # pylint: disable=import-outside-toplevel
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        try:
+            async with self._session.post(self.config.otlp_endpoint, json=otlp_payload(spans, self.config.service_name),
+                                          headers=self.config.otlp_headers) as response:
+                if response.status >= 300:
+                    self.logger.error("OTLP export of %d spans failed: HTTP %d", len(spans), response.status)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            self.logger.error("OTLP export of %d spans failed: %s", len(spans), e)
@@ -0,0 +1,123 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+from .types import Tracing
+
+type SpanHandler = Callable[[list[dict]], None]
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: str|None, attributes: dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes
+        self.error: str|None = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def record(self) -> dict:
+        return {"trace_id": self.trace.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "name": self.name, "start": self.start, "end": self.end,
+                "duration_ms": round((self.end - self.start) / 1e6, 3), "attributes": self.attributes,
+                "error": self.error}
+
+
+class Trace:
+    """the spans of one cycle, kept until the root span ends"""
+    __slots__ = ("trace_id", "sampled", "spans", "dropped")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.sampled = sampled
+        self.spans: list[Span] = []
+        self.dropped = 0
+
+
+_current: ContextVar[Span|None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Spans of a cycle are recorded in memory, the trace is handed to the
+    exporters when the root span ends if it was sampled or slower than
+    slow_threshold. Unsampled traces are not recorded without a threshold."""
+
+    def __init__(self):
+        self.config = Tracing()
+        self.handlers: list[SpanHandler] = []
+
+    def configure(self, config: Tracing, handlers: list[SpanHandler]):
+        self.config = config
+        self.handlers = handlers
+
+    @staticmethod
+    def current() -> Span|None:
+        return _current.get()
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span|None]:
+        """root span, e.g. of a collector cycle"""
+        if not self.config.enabled or not self.handlers:
+            yield None
+            return
+        sampled = random.random() < self.config.sample_rate
+        if not sampled and self.config.slow_threshold is None:
+            yield None
+            return
+        root = Span(Trace(sampled), name, None, attributes)
+        try:
+            with self._enter(root):
+                yield root
+        finally:
+            self._finish(root)
+
+    def _finish(self, root: Span):
+        trace = root.trace
+        if not trace.sampled and (root.end - root.start) / 1e9 < self.config.slow_threshold: # type: ignore
+            return
+        if trace.dropped:
+            root.attributes["dropped_spans"] = trace.dropped
+        records = [root.record(), *(span.record() for span in trace.spans)]
+        for handler in self.handlers:
+            handler(records)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span|None]:
+        """child of the current span, a no-op outside of a recorded trace"""
+        parent = _current.get()
+        if parent is None:
+            yield None
+            return
+        trace = parent.trace
+        if len(trace.spans) >= self.config.max_spans:
+            trace.dropped += 1
+            yield None
+            return
+        span = Span(trace, name, parent.span_id, attributes)
+        trace.spans.append(span)
+        with self._enter(span):
+            yield span
+
+    @contextmanager
+    def _enter(self, span: Span):
+        token = _current.set(span)
+        try:
+            yield
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.end = time.time_ns()
+            _current.reset(token)
+
+
+TRACER = Tracer()
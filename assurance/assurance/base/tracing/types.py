@@ -0,0 +1,18 @@
+from typing import Dict
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Tracing(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = False
+    sample_rate: float = 0.01 # fraction of cycles exported completely (head sampling)
+    slow_threshold: float|None = 30.0 # seconds, slower cycles are exported even if not sampled, None disables
+    max_spans: int = 10000 # per cycle, further spans are dropped
+    path: str|None = "/var/tmp/assurance/traces.jsonl" # worker processes append .w<index>
+    max_bytes: int = 50 * 1024 * 1024 # rotate the file at this size
+    backups: int = 3 # rotated files kept as path.1 ... path.N
+    otlp_endpoint: str|None = None # OTLP/HTTP JSON, e.g. http://otel-collector:4318/v1/traces
+    otlp_headers: Dict[str, str] = {}
+    service_name: str = "assurance"
+    flush_interval: float = 5.0 # seconds between exports
@@ -0,0 +1,3 @@
+from .pool import WorkerPool
+from .shard import Shard, assign, stable_hash
+from .types import Workers
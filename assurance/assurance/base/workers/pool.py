@@ -0,0 +1,165 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Any, Callable
+
+from assurance.base.supervisor import FAILURE_EXIT_CODE
+
+from .shard import Shard
+from .types import Workers
+
+
+class WorkerPool:
+    """Runs target(shard) in count spawned processes, each with its own event loop.
+    Crashed workers are restarted with backoff, their cycle statistics are
+    aggregated and the device count per target is saved to weight the next
+    assignment. The assignment is fixed for the lifetime of the pool, so a
+    restarted worker takes over exactly the targets of the crashed one."""
+
+    def __init__(self, config: Workers, name: str, target: Callable[[Shard], Any], grace: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.target = target
+        self.grace = grace # seconds a worker gets to stop after SIGTERM
+        self._stopping = False
+        self.path = os.path.join(config.state_dir, f"workers-{name}.json")
+        self.weights: dict[str, int] = {}
+        self.names: list[str]|None = None # of the first partition, see Shard
+        self.stats: dict[str, dict] = {}
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = self._context.Queue()
+        self._processes: dict[int, Any] = {}
+        self._crashes: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+        self._failed: set[int] = set()
+        self._incomplete: set[int] = set()
+
+    def _load(self) -> dict[str, int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning("ignore unreadable worker state %s: %s", self.path, e)
+            return {}
+
+    def _save(self):
+        weights = {**self.weights, **{target: stats["devices"] for target, stats in self.stats.items()}}
+        try:
+            os.makedirs(self.config.state_dir, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(weights, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.logger.warning("cannot save worker state %s: %s", self.path, e)
+
+    def _start(self, index: int):
+        shard = Shard(index, self.config.count, self.weights, self._queue, self.names)
+        process = self._context.Process(target=self.target, args=(shard,), name=f"worker-{index}", daemon=True)
+        process.start()
+        self._processes[index] = process
+        self.logger.info("worker %d started (pid %d)", index, process.pid)
+
+    def _collect(self, timeout: float):
+        try:
+            report = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if "names" in report:
+            self.names = self.names or report["names"]
+            return
+        stats = self.stats.setdefault(report["target"], {"cycles": 0, "failed": 0, "devices": 0, "duration": 0.0})
+        stats["cycles"] += 1
+        stats["failed"] += 0 if report["ok"] else 1
+        stats["devices"] = report["devices"] or stats["devices"]
+        stats["duration"] += report["duration"]
+        if report["ok"]:
+            self._crashes.pop(report["worker"], None)
+
+    def _check(self):
+        now = time.monotonic()
+        for index, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            del self._processes[index]
+            if process.exitcode == 0:
+                self.logger.info("worker %d finished", index)
+                continue
+            if process.exitcode == FAILURE_EXIT_CODE:
+                self.logger.warning("worker %d finished with failed collectors", index)
+                self._incomplete.add(index)
+                continue
+            crashes = self._crashes.get(index, 0) + 1
+            self._crashes[index] = crashes
+            if crashes > self.config.max_restarts:
+                self.logger.error("worker %d crashed %d times (exit code %s), giving up", index, crashes, process.exitcode)
+                self._failed.add(index)
+                continue
+            backoff = self.config.restart_backoff * 2 ** (crashes - 1)
+            self.logger.error("worker %d crashed (exit code %s), restart in %.0fs", index, process.exitcode, backoff)
+            self._restart_at[index] = now + backoff
+        for index, at in list(self._restart_at.items()):
+            if at <= now:
+                del self._restart_at[index]
+                self._start(index)
+
+    def report(self):
+        cycles = sum(stats["cycles"] for stats in self.stats.values())
+        failed = sum(stats["failed"] for stats in self.stats.values())
+        devices = sum(stats["devices"] for stats in self.stats.values())
+        duration = sum(stats["duration"] for stats in self.stats.values())
+        self.logger.info("%d workers, %d targets, %d devices: %d cycles (%d failed), %.1fs collecting",
+                         len(self._processes), len(self.stats), devices, cycles, failed, duration)
+        self._save()
+
+    def run(self) -> int:
+        """returns the exit code: 1 if a worker was given up, FAILURE_EXIT_CODE if
+        collectors of a worker failed"""
+        self.weights = self._load()
+        for index in range(self.config.count):
+            self._start(index)
+        previous = {sig: signal.signal(sig, self._stop_signal) for sig in (signal.SIGTERM, signal.SIGINT)}
+        reported = time.monotonic()
+        try:
+            while (self._processes or self._restart_at) and not self._stopping:
+                self._collect(timeout=1.0)
+                self._check()
+                if time.monotonic() - reported >= self.config.report_interval:
+                    self.report()
+                    reported = time.monotonic()
+        finally:
+            self._stop()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        while not self._queue.empty():
+            self._collect(timeout=0.1)
+        self.report()
+        if self._failed:
+            return 1
+        return FAILURE_EXIT_CODE if self._incomplete else 0
+
+    def _stop_signal(self, signum, frame): # pylint: disable=unused-argument
+        self.logger.info("%s received, stopping %d workers", signal.Signals(signum).name, len(self._processes))
+        self._stopping = True
+
+    def _stop(self):
+        """SIGTERM lets the workers shut down gracefully, killed after the grace period"""
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.grace + 10
+        for index, process in self._processes.items():
+            while process.is_alive() and time.monotonic() < deadline:
+                self._collect(timeout=0.1)
+                process.join(timeout=0)
+            if process.is_alive():
+                self.logger.error("worker %d did not stop in time, killed", index)
+                process.kill()
+                process.join()
+        self._processes = {}
@@ -0,0 +1,61 @@
+import zlib
+from typing import Any, Iterable
+
+
+def stable_hash(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+def assign(names: Iterable[str], count: int, weights: dict[str, int]) -> dict[str, int]:
+    """Assigns targets to count workers. The heaviest targets (by device count of
+    the last cycle) are placed first, each on the least loaded worker; ties are
+    ordered by a stable hash, so every worker computes the same assignment."""
+    names = sorted(set(names), key=lambda name: (-weights.get(name, 0), stable_hash(name), name))
+    known = [weights[name] for name in names if weights.get(name)]
+    default = sum(known) // len(known) if known else 1
+    load = [0] * count
+    assignment = {}
+    for name in names:
+        worker = min(range(count), key=lambda i: (load[i], i))
+        assignment[name] = worker
+        load[worker] += weights.get(name) or default
+    return assignment
+
+
+class Shard:
+    """The part of the targets a worker process runs. Cycle statistics and the
+    names of the first partition are reported to the parent through queue, a
+    restarted worker is given these names to compute the same assignment."""
+
+    def __init__(self, index: int, count: int, weights: dict[str, int], queue: Any = None,
+                 names: list[str]|None = None):
+        self.index = index
+        self.count = count
+        self.weights = weights
+        self.queue = queue
+        self.names = names
+        self._assignment: dict[str, int] = {}
+
+    def owns(self, name: str) -> bool:
+        if name not in self._assignment:
+            # all targets known to this process are assigned together, new ones by hash
+            self._assignment[name] = stable_hash(name) % self.count
+        return self._assignment[name] == self.index
+
+    def partition(self, names: Iterable[str]) -> list[str]:
+        """return the names owned by this worker. The names of the first partition
+        are balanced by weight, assigned targets never move and later ones are
+        placed by hash, so all workers agree whatever reloads they have seen."""
+        names = list(names)
+        if self.names is None:
+            self.names = names
+            if self.queue is not None:
+                self.queue.put_nowait({"worker": self.index, "names": names})
+        if not self._assignment:
+            self._assignment = assign(self.names, self.count, self.weights)
+        return [name for name in names if self.owns(name)]
+
+    def report(self, target: str, devices: int, duration: float, ok: bool):
+        if self.queue is not None:
+            self.queue.put_nowait({"worker": self.index, "target": target, "devices": devices,
+                                   "duration": duration, "ok": ok})
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Workers(BaseModel):
+    model_config = ConfigDict(strict=True)
+    count: int = Field(default=1, ge=1) # worker processes, also --workers
+    state_dir: str = "/var/tmp/assurance" # device count per target, used to weight the assignment
+    max_restarts: int = 5 # consecutive crashes of a worker before it is given up
+    restart_backoff: float = 5.0 # seconds, doubled per consecutive crash
+    report_interval: float = 300.0 # seconds between aggregated worker statistics
@@ -1,2 +1,3 @@
 from .client import CustomerClient
-from .types import Customer
+from .snapshot import CustomerSnapshot
+from .types import Customer, CustomerDirectory
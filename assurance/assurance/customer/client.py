@@ -1,17 +1,41 @@
 
+from assurance.base.metrics import STAGE_LATENCY
+from assurance.base.tracing import TRACER
 from assurance.elasticsearch import ElasticsearchSession
 
+from .snapshot import CustomerSnapshot
 from .types import Customer
 
 
 class CustomerClient:
-    def __init__(self, elasticsearch: ElasticsearchSession):
+    def __init__(self, elasticsearch: ElasticsearchSession, snapshot: CustomerSnapshot|None = None):
         self.elasticsearch = elasticsearch
+        self.snapshot = snapshot
 
     async def get_customer_info(self, uuid: str|None = None, hostname: str|None = None,
                                 uuid_required: bool = False) -> Customer|None:
-        search_host = None if uuid_required else hostname
+        with STAGE_LATENCY.time(stage="customer_lookup"), \
+             TRACER.span("get_customer_info", uuid=uuid or "", hostname=hostname or ""):
+            return await self._get_customer_info(uuid, None if uuid_required else hostname)
+
+    async def _get_customer_info(self, uuid: str|None, search_host: str|None) -> Customer|None:
+        if self.snapshot is not None and self.snapshot.config.enabled:
+            return await self._get_from_snapshot(self.snapshot, uuid, search_host)
         customer = await self.elasticsearch.search_nms_managed_account(uuid=uuid, hostname=search_host)
         if customer is not None:
             return Customer(**customer)
         return None
+
+    async def _get_from_snapshot(self, snapshot: CustomerSnapshot, uuid: str|None, hostname: str|None) -> Customer|None:
+        await snapshot.refresh(self.elasticsearch)
+        customer = snapshot.find(uuid=uuid, hostname=hostname)
+        if customer is None and not snapshot.is_unknown(uuid, hostname):
+            # not in the snapshot yet, ask elasticsearch once per negative_ttl
+            customer = await self.elasticsearch.search_nms_managed_account(uuid=uuid, hostname=hostname)
+            if customer is None:
+                snapshot.set_unknown(uuid, hostname)
+            else:
+                snapshot.add(customer)
+        if customer is not None:
+            return Customer(**customer)
+        return None
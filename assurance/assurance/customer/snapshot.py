@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from assurance.elasticsearch import ElasticsearchSession
+
+from .types import Customer, CustomerDirectory
+
+
+class CustomerSnapshot:
+    """In-memory copy of the managed accounts, indexed by uuid and hostname.
+    Loaded once, refreshed incrementally by @timestamp when the ttl expired."""
+
+    def __init__(self, config: CustomerDirectory):
+        self.config = config
+        self.by_uuid: dict[str, dict] = {}
+        self.by_hostname: dict[str, dict] = {}
+        self.loaded_until: str|None = None
+        self.refreshed_at = 0.0
+        self._negative: dict[tuple, float] = {}
+        self._lock = asyncio.Lock()
+        self._source = list(Customer.model_fields.keys()) + ["uuid", "nms_hostname", "@timestamp"]
+
+    def _add(self, document: dict):
+        stamp = document.get("@timestamp", "")
+        for index, key in ((self.by_uuid, document.get("uuid")), (self.by_hostname, document.get("nms_hostname"))):
+            if key is None:
+                continue
+            current = index.get(key)
+            if current is None or current.get("@timestamp", "") <= stamp:
+                index[key] = document
+        if self.loaded_until is None or stamp > self.loaded_until:
+            self.loaded_until = stamp
+
+    async def refresh(self, elasticsearch: ElasticsearchSession, force: bool = False):
+        async with self._lock:
+            if not force and time.monotonic() - self.refreshed_at < self.config.ttl:
+                return
+            query = None
+            if self.loaded_until is not None:
+                query = {"range": {"@timestamp": {"gt": self.loaded_until}}}
+            count = 0
+            async for document in elasticsearch.scan(self.config.index, query, source=self._source):
+                self._add(document)
+                count += 1
+            if count:
+                self._negative.clear()
+            self.refreshed_at = time.monotonic()
+
+    def add(self, document: dict):
+        self._add(document)
+
+    def find(self, uuid: str|None = None, hostname: str|None = None) -> dict|None:
+        if uuid is not None and (document := self.by_uuid.get(uuid)) is not None:
+            return document
+        if hostname is not None and (document := self.by_hostname.get(hostname)) is not None:
+            return document
+        return None
+
+    def is_unknown(self, uuid: str|None, hostname: str|None) -> bool:
+        expires = self._negative.get((uuid, hostname))
+        return expires is not None and expires > time.monotonic()
+
+    def set_unknown(self, uuid: str|None, hostname: str|None):
+        self._negative[(uuid, hostname)] = time.monotonic() + self.config.negative_ttl
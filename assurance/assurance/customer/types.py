@@ -9,3 +9,10 @@ class Customer(BaseModel):
     opennet_account: int
     mgmt_center_name: str
     nms_proactive: bool = False
+
+class CustomerDirectory(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    index: str = "nms_managed_accounts-raw_*"
+    ttl: int = 900 # seconds until the snapshot is refreshed incrementally
+    negative_ttl: int = 300 # seconds an unknown device is not searched again
@@ -5,6 +5,8 @@ from .types import (
     AlertKey,
     AlertSeverity,
     Einstein,
+    EinsteinCache,
+    EinsteinScheduler,
     EinsteinMessage,
     KeepAliveAlert,
 )
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from typing import Tuple
+
+from .types import EinsteinCache
+
+type StateKey = Tuple[str, str, str] # (index_prefix, node_name, alert_type)
+
+_MISSING = object()
+
+
+class AlertStateCache:
+    """LRU cache of the last alert/keep-alive per key. A cached None means the
+    key is known to have no state in Elasticsearch."""
+
+    def __init__(self, config: EinsteinCache):
+        self.config = config
+        self._entries: OrderedDict[StateKey, dict|None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: StateKey) -> Tuple[bool, dict|None]:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return True, value # type: ignore
+
+    def put(self, key: StateKey, value: dict|None):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_size:
+            self._entries.popitem(last=False)
+
+    def full(self) -> bool:
+        return len(self._entries) >= self.config.max_size
@@ -0,0 +1,81 @@
+"""
+Compact binary encoding of EinsteinMessage, an alternative to JSON.
+
+    magic "EM", version byte, then one value per field of FIELDS in order:
+    b"s" + varint length + utf-8 bytes | b"i" + zigzag varint | b"n" (None)
+
+The schema version is also sent as Kafka header, consumers pick the decoder by it.
+"""
+from .types import EinsteinMessage
+
+SCHEMA_VERSION = 1
+SCHEMA_HEADER = ("schema", f"einstein-compact/{SCHEMA_VERSION}".encode("ascii"))
+MAGIC = b"EM"
+
+# field order of schema version 1, never reorder, append for a new version
+FIELDS = (
+    "event", "alert_type", "summary", "short_summary", "sla_code", "severity",
+    "node_name", "node_ip", "organisation_id", "organisation_name", "alert_source",
+    "agent", "first_occurence", "last_occurence", "location", "customer_number",
+    "keepalive_timeout",
+)
+
+
+def _varint(value: int, out: bytearray):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_compact(message: EinsteinMessage) -> bytes:
+    out = bytearray(MAGIC)
+    out.append(SCHEMA_VERSION)
+    for name in FIELDS:
+        value = getattr(message, name)
+        if hasattr(value, "value"): # enum
+            value = value.value
+        if value is None:
+            out += b"n"
+        elif isinstance(value, int):
+            out += b"i"
+            _varint((value << 1) ^ (value >> 63), out)
+        else:
+            data = str(value).encode("utf-8")
+            out += b"s"
+            _varint(len(data), out)
+            out += data
+    return bytes(out)
+
+
+def decode_compact(data: bytes) -> dict:
+    if data[:2] != MAGIC or data[2] != SCHEMA_VERSION:
+        raise ValueError("not an einstein compact message of schema version 1")
+    message: dict = {}
+    pos = 3
+    for name in FIELDS:
+        tag = data[pos:pos + 1]
+        pos += 1
+        if tag == b"n":
+            message[name] = None
+        elif tag == b"i":
+            raw, pos = _read_varint(data, pos)
+            message[name] = (raw >> 1) ^ -(raw & 1)
+        elif tag == b"s":
+            length, pos = _read_varint(data, pos)
+            message[name] = data[pos:pos + length].decode("utf-8")
+            pos += length
+        else:
+            raise ValueError(f"invalid tag {tag!r} for field {name}")
+    return message
@@ -0,0 +1,112 @@
+import asyncio
+import contextvars
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+from assurance.base.assurance import Assurance
+
+from .types import EinsteinScheduler
+
+
+class _Job:
+    def __init__(self, key: Hashable, critical: bool, factory: Callable[[], Awaitable]):
+        self.key = key
+        self.critical = critical
+        self.factory = factory
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.context = contextvars.copy_context() # of the submitter, e.g. its trace span
+        # failures are logged by the scheduler, awaiting the future is optional
+        self.done.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class OutboundScheduler(Assurance):
+    """Runs outbound sends in two lanes. Critical jobs have dedicated workers,
+    the shared workers take critical jobs first and fill up with routine ones.
+    Jobs with the same key are never run concurrently and keep their order."""
+
+    def __init__(self, config: EinsteinScheduler):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self._critical: deque[_Job] = deque()
+        self._routine: deque[_Job] = deque()
+        self._pending: dict[Hashable, deque[_Job]] = {}
+        self._condition = asyncio.Condition()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._outstanding = 0
+        self._closed = False
+        self._workers: list[asyncio.Task] = []
+
+    def start(self):
+        self._closed = False
+        for _ in range(self.config.critical_concurrency):
+            self._workers.append(asyncio.create_task(self._worker(shared=False)))
+        for _ in range(self.config.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(shared=True)))
+
+    async def close(self):
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.config.drain_timeout)
+        except TimeoutError:
+            self.logger.error("dropping %d einstein sends not done after %.0fs", self._outstanding,
+                              self.config.drain_timeout)
+            for worker in self._workers:
+                worker.cancel()
+            for job in [*self._critical, *self._routine, *(job for jobs in self._pending.values() for job in jobs)]:
+                job.done.cancel()
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, key: Hashable, critical: bool, factory: Callable[[], Awaitable]) -> asyncio.Future:
+        """queue the job, the returned future is resolved when it has run"""
+        job = _Job(key, critical, factory)
+        self._outstanding += 1
+        self._idle.clear()
+        if key in self._pending:
+            # keep order per key, the job is queued when its predecessor is done
+            self._pending[key].append(job)
+            return job.done
+        self._pending[key] = deque()
+        await self._enqueue(job)
+        return job.done
+
+    async def _enqueue(self, job: _Job):
+        async with self._condition:
+            (self._critical if job.critical else self._routine).append(job)
+            self._condition.notify_all()
+
+    def _ready(self, shared: bool) -> bool:
+        return self._closed or bool(self._critical) or (shared and bool(self._routine))
+
+    async def _worker(self, shared: bool):
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._ready(shared))
+                if self._critical:
+                    job = self._critical.popleft()
+                elif shared and self._routine:
+                    job = self._routine.popleft()
+                else:
+                    return
+            await self._execute(job)
+
+    async def _execute(self, job: _Job):
+        try:
+            job.done.set_result(await asyncio.create_task(job.factory(), context=job.context))
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.error("outbound job %s failed: %s", job.key, e)
+            job.done.set_exception(e)
+        finally:
+            if not job.done.done():
+                job.done.cancel() # worker cancelled at close
+            successors = self._pending.get(job.key)
+            if successors:
+                await self._enqueue(successors.popleft())
+            else:
+                self._pending.pop(job.key, None)
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._idle.set()
@@ -1,9 +1,17 @@
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
 
 from assurance.base.assurance import Assurance
+from assurance.base.metrics import REGISTRY
+from assurance.base.tracing import TRACER
 from assurance.elasticsearch import ElasticsearchSession
-from assurance.kafka import KafkaSession
+from assurance.sink import Sink, message_sink
 
+from .cache import AlertStateCache
+from .encoding import SCHEMA_HEADER, encode_compact
+from .scheduler import OutboundScheduler
 from .types import (
     Alert,
     AlertEvent,
@@ -13,17 +21,68 @@ from .types import (
     KeepAliveAlert,
 )
 
+# sends scheduled by the current task, see EinsteinSession.tracked()
+_scheduled: ContextVar[list[asyncio.Future]|None] = ContextVar("einstein_scheduled", default=None)
 
-class EinsteinSession(Assurance, KafkaSession):
+ALERTS = REGISTRY.counter("assurance_alerts_total", "einstein messages by event and severity, sent or only logged",
+                          ("event", "severity", "sent"))
 
-    def __init__(self, config: Einstein, elasticsearch: ElasticsearchSession):
+
+class EinsteinSession(Assurance):
+
+    def __init__(self, config: Einstein, elasticsearch: ElasticsearchSession, sink: Sink|None = None):
         Assurance.__init__(self, __name__)
-        KafkaSession.__init__(self, config.kafka)
         self.config = config
+        self.sink = sink if sink is not None else message_sink(None, config.kafka)
         self.elasticsearch = elasticsearch
+        self.scheduler = OutboundScheduler(config.scheduler)
+        self.cache = AlertStateCache(config.cache)
+        self._recording: set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        await self.sink.__aenter__()
+        if self.config.cache.enabled and self.config.cache.warm_load:
+            await self._warm_load()
+        if self.config.scheduler.enabled:
+            self.scheduler.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if self.config.scheduler.enabled:
+                await self.scheduler.close()
+        finally:
+            await self.sink.__aexit__(exc_type, exc, tb)
+            if self._recording: # events of messages acknowledged at close
+                await asyncio.wait(self._recording)
 
-    async def send(self, message: EinsteinMessage, send_to_einstein: bool = True):
-        should_send = send_to_einstein and self.config.kafka.enabled and message.event != "CHECK" and message.event != "MAINT"
+    @asynccontextmanager
+    async def tracked(self):
+        """wait for the sends scheduled within the block, re-raise the first failure"""
+        scheduled: list[asyncio.Future] = []
+        token = _scheduled.set(scheduled)
+        try:
+            yield self
+        finally:
+            _scheduled.reset(token)
+        for result in await asyncio.gather(*scheduled, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+
+    def _is_critical(self, alert: Alert) -> bool:
+        return alert.event == AlertEvent.DOWN or alert.severity.value <= AlertSeverity.CRITICAL.value
+
+    async def _schedule(self, node_name: str, alert_type: str, critical: bool, factory):
+        if self.config.scheduler.enabled:
+            done = await self.scheduler.submit((node_name, alert_type), critical, factory)
+            if (scheduled := _scheduled.get()) is not None:
+                scheduled.append(done)
+        else:
+            await factory()
+
+    async def send(self, message: EinsteinMessage, send_to_einstein: bool = True) -> asyncio.Future|None:
+        """returns the delivery of the message, see Sink.emit()"""
+        should_send = send_to_einstein and not self.sink.discards and message.event != "CHECK" and message.event != "MAINT"
         prefix = "+" if should_send else "-"
         for mapping in self.config.node_mapping:
             if message.node_name == mapping.from_node_name:
@@ -33,16 +92,75 @@ class EinsteinSession(Assurance, KafkaSession):
             message.event = AlertEvent('UP').value
         self.logger.info("%sEinstein: %s/%s [%s/%s] %s", prefix, message.event, AlertSeverity(message.severity).name,
                          message.node_name, message.alert_type, message.short_summary)
+        ALERTS.inc(event=str(message.event), severity=AlertSeverity(message.severity).name, sent=str(should_send).lower())
         if should_send:
-            await self.produce(self.config.kafka.topic, message.model_dump())
+            # keyed per alert, so one node/alert_type stays on one partition in order
+            key = f"{message.node_name}/{message.alert_type}"
+            if self.config.encoding == "compact":
+                return await self.sink.emit(self.config.kafka.topic, encode_compact(message), key=key, headers=[SCHEMA_HEADER])
+            return await self.sink.emit(self.config.kafka.topic, message.model_dump(), key=key)
+        return None
+
+    # --- alert state cache --------------------------------------------------------
+
+    async def _warm_load(self):
+        state_index = self.elasticsearch.config.state_index
+        if state_index is None:
+            return
+        async with aclosing(self.elasticsearch.scan(state_index)) as states: # clears the scroll on break
+            async for state in states:
+                if self.cache.full():
+                    break
+                self.cache.put((state["state_of"], state["node_name"], state["alert_type"]), state)
+        self.logger.info("warm loaded %d alert states from %s", len(self.cache), state_index)
+
+    async def _get_state(self, index_prefix: str, node_name: str, alert_type: str, lookup) -> dict|None:
+        if not self.config.cache.enabled:
+            return await lookup(node_name, alert_type)
+        key = (index_prefix, node_name, alert_type)
+        hit, state = self.cache.lookup(key)
+        if not hit:
+            state = await lookup(node_name, alert_type)
+            self.cache.put(key, state)
+        return state
+
+    async def _write_event(self, index_prefix: str, data: dict):
+        await self.elasticsearch.write_event(index_prefix, data)
+        if self.config.cache.enabled:
+            self.cache.put((index_prefix, data["node_name"], data["alert_type"]), data)
+
+    async def _write_event_once_sent(self, delivery: asyncio.Future|None, index_prefix: str, data: dict):
+        """record the event once the message is delivered, without waiting for the ack"""
+        if delivery is None:
+            await self._write_event(index_prefix, data)
+            return
+        def delivered(future: asyncio.Future):
+            if future.cancelled() or future.exception() is not None:
+                self.logger.error("%s/%s not delivered, not recorded in %s", data["node_name"], data["alert_type"], index_prefix)
+                return
+            recording = asyncio.create_task(self._write_event(index_prefix, data))
+            self._recording.add(recording)
+            recording.add_done_callback(self._recorded)
+        delivery.add_done_callback(delivered)
+
+    def _recorded(self, recording: asyncio.Task):
+        self._recording.discard(recording)
+        if not recording.cancelled() and (error := recording.exception()) is not None:
+            self.logger.error("recording einstein event failed: %s", error)
 
     async def get_last_alert(self, node_name: str, alert_type: str) -> dict|None:
-        return await self.elasticsearch.get_last_alert(node_name, alert_type)
+        with TRACER.span("get_last_alert", node_name=node_name, alert_type=alert_type):
+            return await self._get_state(self.elasticsearch.config.alert_index, node_name, alert_type,
+                                         self.elasticsearch.get_last_alert)
 
     async def get_last_keep_alive(self, node_name: str, alert_type: str) -> dict|None:
-        return await self.elasticsearch.get_last_keep_alive(node_name, alert_type)
+        return await self._get_state(self.elasticsearch.config.keep_alive_index, node_name, alert_type,
+                                     self.elasticsearch.get_last_keep_alive)
 
     async def send_keep_alive(self, alert: KeepAliveAlert):
+        await self._schedule(alert.node_name, alert.alert_type, False, lambda: self._send_keep_alive(alert))
+
+    async def _send_keep_alive(self, alert: KeepAliveAlert):
         message = EinsteinMessage(
                     alert_type = alert.alert_type,
                     event = AlertEvent.KEEP_ALIVE,
@@ -63,10 +181,13 @@ class EinsteinSession(Assurance, KafkaSession):
             time_difference = current_occurence_time - current_occurence_time
             if time_difference.total_seconds() < self.config.keepalive_timeout * 60:
                 message.first_occurence = last_alert.first_occurence
-        await self.send(message)
-        await self.elasticsearch.write_to_monthly(self.elasticsearch.config.keep_alive_index, message.model_dump())
+        delivery = await self.send(message)
+        await self._write_event_once_sent(delivery, self.elasticsearch.config.keep_alive_index, message.model_dump())
 
     async def send_alert(self, alert: Alert):
+        await self._schedule(alert.node_name, alert.alert_type, self._is_critical(alert), lambda: self._send_alert(alert))
+
+    async def _send_alert(self, alert: Alert):
         customer = {}
         if alert.customer is not None:
             customer = {
@@ -95,5 +216,6 @@ class EinsteinSession(Assurance, KafkaSession):
             if message.event == "DOWN" and last_alert.event != "DOWN":
                 #self.logger.info("device '%s' is going down, reset first_occurance to %s", message.node_name, message.last_occurence)
                 message.first_occurence = message.last_occurence
-        await self.send(message, alert.einstein)
-        await self.elasticsearch.write_to_monthly(self.elasticsearch.config.alert_index, {**message.model_dump(), "addons": alert.addons})
+        delivery = await self.send(message, alert.einstein)
+        await self._write_event_once_sent(delivery, self.elasticsearch.config.alert_index,
+                                          {**message.model_dump(), "addons": alert.addons})
@@ -1,8 +1,8 @@
 from datetime import datetime, timezone
 from enum import Enum
-from typing import List
+from typing import List, Literal
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from assurance.customer import Customer
 from assurance.kafka import KafkaNode
@@ -29,16 +29,34 @@ class NodeMapping(BaseModel):
     to_organisation_id: int
 
 
+class EinsteinScheduler(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    critical_concurrency: int = Field(default=2, ge=1) # workers reserved for DOWN and severity <= CRITICAL
+    concurrency: int = Field(default=4, ge=1) # shared workers, critical first then routine
+    drain_timeout: float = 30.0 # seconds queued sends may take at close, then they are dropped
+
+
+class EinsteinCache(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    max_size: int = Field(default=50000, ge=1) # entries, least recently used are evicted
+    warm_load: bool = True # load the state index in bulk when the session starts
+
+
 class Einstein(BaseModel):
     keepalive_timeout: int
     kafka: KafkaNode
     node_mapping: List[NodeMapping] = []
     clear_all: bool = False
+    scheduler: EinsteinScheduler = EinsteinScheduler()
+    cache: EinsteinCache = EinsteinCache()
+    encoding: Literal["json", "compact"] = "json" # compact: see einstein/encoding.py
 
 
 class EinsteinKey(BaseModel):
     alert_type: str
-    first_occurence: str = datetime.now(timezone.utc).isoformat()
+    first_occurence: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 # see: https://tasktrack.telekom.at/confluence/display/SA/Test+support+documentation
 # key = (alert_type, organisation_id, first_occurence)
@@ -56,8 +74,8 @@ class EinsteinMessage(BaseModel):
     organisation_name: str = 'A1 Telekom Austria AG'
     alert_source: str
     agent: str
-    first_occurence: str = datetime.now(timezone.utc).isoformat()
-    last_occurence: str = datetime.now(timezone.utc).isoformat()
+    first_occurence: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    last_occurence: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     location: str|int = 0
     customer_number: int = 0
     keepalive_timeout: int = 20    
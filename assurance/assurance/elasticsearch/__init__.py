@@ -1,2 +1,8 @@
 from .session import ElasticsearchSession
-from .types import Elasticsearch, ElasticsearchNode
+from .types import (
+    Elasticsearch,
+    ElasticsearchBulk,
+    ElasticsearchMultiSearch,
+    ElasticsearchNode,
+    ElasticsearchRouting,
+)
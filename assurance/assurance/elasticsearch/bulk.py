@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from assurance.base.metrics import ELASTICSEARCH_LATENCY, REGISTRY
+
+from .types import ElasticsearchBulk
+
+if TYPE_CHECKING:
+    from elasticsearch7 import AsyncElasticsearch
+
+BULK_DOCUMENTS = REGISTRY.counter("assurance_elasticsearch_bulk_documents_total", "documents sent with _bulk by result",
+                                  ("result",))
+
+class BulkWriter:
+    """Collects index operations and sends them as `_bulk` requests, once a batch
+    reaches max_docs or max_bytes or is older than the linger interval. At most
+    max_pending batches are in flight, further writers wait (backpressure).
+    With a fallback set, documents of failed requests and retryable items
+    (429, 5xx) are handed to it instead of raising on the next add."""
+
+    def __init__(self, client: "AsyncElasticsearch", config: ElasticsearchBulk):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.config = config
+        self._lines: list[str] = []
+        self._records: list[tuple[str, str|None, dict]] = []
+        self._docs = 0
+        self._bytes = 0
+        self._since = 0.0
+        self._slots = asyncio.Semaphore(config.max_pending)
+        self._tasks: set[asyncio.Task] = set()
+        self._linger: asyncio.Task|None = None
+        self._error: Exception|None = None
+        self.fallback: Callable[[list[tuple[str, str|None, dict]]], Awaitable]|None = None
+        # notified of documents that were not written and not handed to the fallback
+        self.listeners: list[Callable[[list[tuple[str, str|None, dict]]], None]] = []
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        self._linger = asyncio.create_task(self._linger_loop())
+
+    async def close(self):
+        if self._linger is not None:
+            self._linger.cancel()
+            self._linger = None
+        await self.drain()
+        if self.written or self.failed:
+            self.logger.debug("bulk: %d documents written, %d failed", self.written, self.failed)
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def drain(self):
+        """sends the current batch and waits for all requests in flight"""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def add(self, index: str, document: dict, doc_id: str|None = None):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        action = {"_index": index}
+        if doc_id is not None:
+            action["_id"] = doc_id
+        lines = f'{json.dumps({"index": action})}\n{json.dumps(document, default=str)}\n'
+        if not self._lines:
+            self._since = time.monotonic()
+        self._lines.append(lines)
+        self._records.append((index, doc_id, document))
+        self._docs += 1
+        self._bytes += len(lines)
+        if self._docs >= self.config.max_docs or self._bytes >= self.config.max_bytes:
+            await self.flush()
+
+    async def flush(self):
+        if not self._lines:
+            return
+        # a flush cancelled while waiting for a slot leaves the batch buffered
+        await self._slots.acquire()
+        if not self._lines: # sent by a concurrent flush meanwhile
+            self._slots.release()
+            return
+        body, docs, records = "".join(self._lines), self._docs, self._records
+        self._lines, self._records, self._docs, self._bytes = [], [], 0, 0
+        task = asyncio.create_task(self._send(body, docs, records))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _linger_loop(self):
+        while True:
+            await asyncio.sleep(self.config.linger)
+            if self._lines and time.monotonic() - self._since >= self.config.linger:
+                await self.flush()
+
+    async def _send(self, body: str, docs: int, records: list[tuple[str, str|None, dict]]):
+        try:
+            with ELASTICSEARCH_LATENCY.time(operation="bulk"):
+                response = await self.client.bulk(body=body) # pylint: disable=no-value-for-parameter
+            retry, lost = self._report(response, docs, records)
+            if retry and self.fallback is not None:
+                await self._hand_over(retry)
+            else:
+                lost += retry
+            self._lost(lost)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.error("bulk request with %d documents failed: %s", docs, e)
+            self.failed += docs
+            BULK_DOCUMENTS.inc(docs, result="failed")
+            if self.fallback is not None:
+                await self._hand_over(records)
+            else:
+                self._error = e
+                self._lost(records)
+        finally:
+            self._slots.release()
+
+    async def _hand_over(self, records: list[tuple[str, str|None, dict]]):
+        try:
+            await self.fallback(records)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.error("bulk fallback for %d documents failed: %s", len(records), e)
+            self._error = e
+            self._lost(records)
+
+    def _lost(self, records: list[tuple[str, str|None, dict]]):
+        if not records:
+            return
+        for listener in self.listeners:
+            try:
+                listener(records)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.error("bulk failure listener failed: %s", e)
+
+    def _report(self, response: dict, docs: int, records: list[tuple[str, str|None, dict]]) -> tuple[list, list]:
+        """returns the records of retryable and of permanently failed items"""
+        retry, lost = [], []
+        if not response.get("errors"):
+            self.written += docs
+            BULK_DOCUMENTS.inc(docs, result="written")
+            return retry, lost
+        for item, record in zip(response["items"], records):
+            result = next(iter(item.values()))
+            if "error" in result:
+                self.failed += 1
+                BULK_DOCUMENTS.inc(result="failed")
+                if result.get("status", 0) == 429 or result.get("status", 0) >= 500:
+                    retry.append(record)
+                else:
+                    lost.append(record)
+                self.logger.error("bulk item %s/%s failed: %s", result.get("_index"), result.get("_id"),
+                                  result["error"].get("reason", result["error"]) if isinstance(result["error"], dict) else result["error"])
+            else:
+                self.written += 1
+                BULK_DOCUMENTS.inc(result="written")
+        return retry, lost
@@ -0,0 +1,70 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+from .types import ElasticsearchMultiSearch
+
+if TYPE_CHECKING:
+    from elasticsearch7 import AsyncElasticsearch
+
+
+class MultiSearchBatcher:
+    """Coalesces searches issued within the linger interval into one `_msearch`
+    request and routes every response back to the future of its caller."""
+
+    def __init__(self, client: "AsyncElasticsearch", config: ElasticsearchMultiSearch):
+        self.client = client
+        self.config = config
+        self._pending: list[tuple[dict, dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle|None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def search(self, index: str, body: dict, ignore_unavailable: bool = False) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        header = {"index": index}
+        if ignore_unavailable:
+            header["ignore_unavailable"] = True
+        self._pending.append((header, body, future))
+        if len(self._pending) >= self.config.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.config.linger, self._flush)
+        return await future
+
+    async def close(self):
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[dict, dict, asyncio.Future]]):
+        body = []
+        for header, search, _ in batch:
+            body.append(header)
+            body.append(search)
+        try:
+            response = await self.client.msearch(body=body) # pylint: disable=no-value-for-parameter
+        except Exception as e: # pylint: disable=broad-exception-caught
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, response["responses"]):
+            if future.done():
+                continue
+            if "error" in result:
+                error = result["error"]
+                error_type = error.get("type", "unknown") if isinstance(error, dict) else str(error)
+                from elasticsearch7 import TransportError # pylint: disable=import-outside-toplevel
+                future.set_exception(TransportError(result.get("status", 500), error_type, error))
+            else:
+                future.set_result(result)
@@ -0,0 +1,58 @@
+import re
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from .types import ElasticsearchRouting
+
+if TYPE_CHECKING:
+    from elasticsearch7 import AsyncElasticsearch
+
+SLOT_FORMAT = "%Y.%m" # same as write_to_monthly
+SLOT = re.compile(r"^\d{4}\.\d{2}$")
+
+
+class IndexRouter:
+    """Splits a `prefix*` pattern into tiers of concrete monthly indices, the
+    current and previous slot first, then older slots newest first."""
+
+    def __init__(self, client: "AsyncElasticsearch", config: ElasticsearchRouting):
+        self.client = client
+        self.config = config
+        self._indices: dict[str, tuple[float, list[str]]] = {}
+
+    @staticmethod
+    def recent_slots(now: datetime|None = None) -> list[str]:
+        now = now or datetime.now()
+        previous = datetime(now.year - 1, 12, 1) if now.month == 1 else datetime(now.year, now.month - 1, 1)
+        return [now.strftime(SLOT_FORMAT), previous.strftime(SLOT_FORMAT)]
+
+    async def indices(self, pattern: str) -> list[str]:
+        cached = self._indices.get(pattern)
+        if cached is not None and time.monotonic() - cached[0] < self.config.discovery_ttl:
+            return cached[1]
+        response = await self.client.indices.get_alias(index=pattern, ignore=(404,)) # pylint: disable=unexpected-keyword-arg
+        indices = sorted(name for name in response if not name.startswith("."))
+        self._indices[pattern] = (time.monotonic(), indices)
+        return indices
+
+    async def tiers(self, pattern: str) -> list[list[str]]:
+        prefix = pattern[:-1]
+        # recent slots are queried even if not discovered yet, e.g. right after a month change
+        recent = [f"{prefix}{slot}" for slot in self.recent_slots()]
+        slotted, unslotted = [], []
+        for index in await self.indices(pattern):
+            if index in recent:
+                continue
+            if SLOT.match(index[len(prefix):]):
+                slotted.append(index)
+            else:
+                unslotted.append(index)
+        slotted.sort(reverse=True)
+        tiers = [recent]
+        size = self.config.fallback_slots
+        for start in range(0, len(slotted), size):
+            tiers.append(slotted[start:start + size])
+        if unslotted:
+            tiers.append(unslotted)
+        return tiers
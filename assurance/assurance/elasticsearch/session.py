@@ -1,35 +1,82 @@
+import hashlib
 import warnings
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Tuple
 
-from elasticsearch7 import AsyncElasticsearch
+from assurance.base.metrics import ELASTICSEARCH_LATENCY
+from assurance.base.tracing import TRACER
 
+from .bulk import BulkWriter
+from .msearch import MultiSearchBatcher
+from .routing import IndexRouter
 from .types import ElasticsearchNode
 
+if TYPE_CHECKING:
+    from elasticsearch7 import AsyncElasticsearch
+
 warnings.filterwarnings("ignore", message=".*built-in security features are not enabled")
 warnings.filterwarnings("ignore", message=".*using SSL with verify_certs=False is insecure.")
 
 class ElasticsearchSession:
     def __init__(self, config: ElasticsearchNode):
         self.config = config
-        self.client: AsyncElasticsearch
+        self.client: "AsyncElasticsearch|None" = None
+        self.output: Any = None # optional assurance.sink.Sink for writes, see index_document
+        self.bulk: BulkWriter|None = None
+        self.msearch: MultiSearchBatcher|None = None
+        self.router: IndexRouter|None = None
 
     async def __aenter__(self):
+        if not self.config.enabled:
+            # no cluster connection: writes need an output sink, lookups find nothing
+            return self
+        from elasticsearch7 import AsyncElasticsearch # pylint: disable=import-outside-toplevel
         proto = 'https://' if self.config.use_ssl else 'http://'
         host = f"{proto}{self.config.host}"
         self.client = AsyncElasticsearch(
             hosts=[host],
             http_auth=(self.config.user, self.config.passwd),
-            verify_certs=self.config.verify_ssl
+            verify_certs=self.config.verify_ssl,
+            http_compress=self.config.http_compress,
+            maxsize=self.config.maxsize,
+            timeout=self.config.timeout
         )
+        if self.config.bulk.enabled:
+            self.bulk = BulkWriter(self.client, self.config.bulk)
+            self.bulk.start()
+        if self.config.msearch.enabled:
+            self.msearch = MultiSearchBatcher(self.client, self.config.msearch)
+        if self.config.routing.enabled:
+            self.router = IndexRouter(self.client, self.config.routing)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        await self.client.close()
+        try:
+            if self.msearch is not None:
+                await self.msearch.close()
+            if self.bulk is not None:
+                await self.bulk.close()
+        finally:
+            if self.client is not None:
+                await self.client.close()
 
-    async def write(self, index: str, data: dict) -> None:
+    async def write(self, index: str, data: dict, doc_id: str|None = None) -> None:
         if "@timestamp" not in data:
             data["@timestamp"] = data.pop("timestamp") if "timestamp" in data else datetime.now(timezone.utc).isoformat()
-        await self.client.index(index=index, document=data) # pylint: disable=unexpected-keyword-arg,no-value-for-parameter
+        if self.output is not None:
+            await self.output.emit(index, data, doc_id=doc_id)
+            return
+        await self.index_document(index, data, doc_id)
+
+    async def index_document(self, index: str, data: dict, doc_id: str|None = None) -> None:
+        """write to the cluster, bypassing the output sink"""
+        if self.client is None:
+            return
+        if self.bulk is not None:
+            await self.bulk.add(index, data, doc_id)
+            return
+        with ELASTICSEARCH_LATENCY.time(operation="index"):
+            await self.client.index(index=index, document=data, id=doc_id) # pylint: disable=unexpected-keyword-arg,no-value-for-parameter
 
     async def search_last(self, index: str, matches: dict) -> dict|None:
         terms = []
@@ -46,16 +93,63 @@ class ElasticsearchSession:
                 }
             },
             "sort": { "@timestamp" : "desc" },
-            "size": 1
+            "size": 1,
+            # terminate_after is not used, it would cut off the sort and return older hits
+            "track_total_hits": False
         }
-        response = await self.client.search(index=index, body=body)        
-        if response["hits"]["total"]["value"] == 0:
+        if self.router is None or not index.endswith("*"):
+            return await self._search_first(index, body)
+        for tier in await self.router.tiers(index):
+            if (result := await self._search_first(",".join(tier), body, ignore_unavailable=True)) is not None:
+                return result
+        return None
+
+    async def _search_first(self, index: str, body: dict, ignore_unavailable: bool = False) -> dict|None:
+        if self.client is None:
+            return None
+        with ELASTICSEARCH_LATENCY.time(operation="search"):
+            if self.msearch is not None:
+                response = await self.msearch.search(index, body, ignore_unavailable)
+            else:
+                response = await self.client.search(index=index, body=body, ignore_unavailable=ignore_unavailable) # pylint: disable=unexpected-keyword-arg
+        hits = response["hits"]["hits"]
+        if not hits:
             return None
-        return response["hits"]["hits"][0]["_source"]
+        return hits[0]["_source"]
 
-    async def write_to_monthly(self, index_prefix: str, data: dict):
+    async def scan(self, index: str, query: dict|None = None, source: List[str]|None = None,
+                   page_size: int = 1000) -> AsyncIterator[dict]:
+        """iterate over all matching documents with the scroll api"""
+        if self.client is None:
+            return
+        body: dict = {"query": query or {"match_all": {}}, "sort": ["_doc"], "size": page_size}
+        if source is not None:
+            body["_source"] = source
+        response = await self.client.search(index=index, body=body, scroll="2m", ignore_unavailable=True) # pylint: disable=unexpected-keyword-arg
+        scroll_id = response.get("_scroll_id")
+        try:
+            while hits := response["hits"]["hits"]:
+                for hit in hits:
+                    yield hit["_source"]
+                response = await self.client.scroll(scroll_id=scroll_id, scroll="2m") # pylint: disable=unexpected-keyword-arg
+                scroll_id = response.get("_scroll_id")
+        finally:
+            if scroll_id is not None:
+                await self.client.clear_scroll(scroll_id=scroll_id, ignore=(404,)) # pylint: disable=unexpected-keyword-arg
+
+    def monthly(self, index_prefix: str) -> str:
         slot = datetime.now().strftime("%Y.%m")
-        await self.write(f"{index_prefix}{slot}", data)
+        return f"{index_prefix}{slot}"
+
+    async def write_to_monthly(self, index_prefix: str, data: dict):
+        index = self.monthly(index_prefix)
+        with TRACER.span("write_to_monthly", index=index):
+            await self.write(index, data)
+
+    async def put_template(self, name: str, body: dict):
+        if self.client is None:
+            return
+        await self.client.indices.put_template(name=name, body=body) # pylint: disable=unexpected-keyword-arg
 
     async def search_nms_managed_account(self, uuid: str|None = None, hostname: str|None = None) -> dict|None:
         if uuid is not None:
@@ -66,7 +160,68 @@ class ElasticsearchSession:
                 return result
         return None
 
+    # --- latest state per (node_name, alert_type) ---------------------------------
+
+    @staticmethod
+    def state_id(index_prefix: str, node_name: str, alert_type: str) -> str:
+        return hashlib.sha1(f"{index_prefix}|{node_name}|{alert_type}".encode("utf-8")).hexdigest()
+
+    async def write_state(self, index_prefix: str, data: dict):
+        if self.config.state_index is None:
+            return
+        doc_id = self.state_id(index_prefix, data["node_name"], data["alert_type"])
+        await self.write(self.config.state_index, {**data, "state_of": index_prefix}, doc_id)
+
+    async def write_event(self, index_prefix: str, data: dict):
+        """write alert or keep-alive to the monthly history and the latest state index"""
+        await self.write_to_monthly(index_prefix, data)
+        await self.write_state(index_prefix, data)
+
+    async def backfill_state(self, index_prefix: str, page_size: int = 500) -> int:
+        """build the latest state index from the monthly history indices"""
+        if self.config.state_index is None or self.client is None:
+            return 0
+        count = 0
+        after = None
+        while True:
+            composite = {
+                "size": page_size,
+                "sources": [
+                    {"node_name": {"terms": {"field": "node_name.keyword"}}},
+                    {"alert_type": {"terms": {"field": "alert_type.keyword"}}},
+                ]
+            }
+            if after is not None:
+                composite["after"] = after
+            body = {
+                "size": 0,
+                "aggs": {
+                    "keys": {
+                        "composite": composite,
+                        "aggs": {"last": {"top_hits": {"size": 1, "sort": {"@timestamp": "desc"}}}}
+                    }
+                }
+            }
+            response = await self.client.search(index=f"{index_prefix}*", body=body)
+            buckets = response["aggregations"]["keys"]["buckets"]
+            for bucket in buckets:
+                await self.write_state(index_prefix, bucket["last"]["hits"]["hits"][0]["_source"])
+                count += 1
+            after = response["aggregations"]["keys"].get("after_key")
+            if not buckets or after is None:
+                return count
+
     async def _get_last_alert(self, index: str, node_name: str, alert_type: str) -> dict|None:
+        if self.client is None:
+            return None
+        if self.config.state_index is not None:
+            with ELASTICSEARCH_LATENCY.time(operation="get"):
+                response = await self.client.get(index=self.config.state_index, id=self.state_id(index, node_name, alert_type), # pylint: disable=unexpected-keyword-arg
+                                                 ignore=404)
+            if response.get("found"):
+                return response["_source"]
+            if not self.config.state_fallback:
+                return None
         data = await self.search_last(f"{index}*", {
                                             "node_name.keyword": node_name,
                                             "alert_type.keyword": alert_type
@@ -75,6 +230,40 @@ class ElasticsearchSession:
             return None
         return data
 
+    # --- optimistic concurrency, bypasses the output sink ----------------------
+
+    async def get_versioned(self, index: str, doc_id: str) -> Tuple[dict, Tuple[int, int]]|None:
+        """document and its (seq_no, primary_term) version"""
+        if self.client is None:
+            raise ValueError("elasticsearch is disabled")
+        response = await self.client.get(index=index, id=doc_id, ignore=404) # pylint: disable=unexpected-keyword-arg
+        if not response.get("found"):
+            return None
+        return response["_source"], (response["_seq_no"], response["_primary_term"])
+
+    async def put_versioned(self, index: str, doc_id: str, document: dict,
+                            version: Tuple[int, int]|None) -> Tuple[int, int]|None:
+        """create (version None) or replace the document, returns the new version
+        or None if it was changed concurrently"""
+        if self.client is None:
+            raise ValueError("elasticsearch is disabled")
+        if version is None:
+            response = await self.client.create(index=index, id=doc_id, body=document, refresh="wait_for", # pylint: disable=unexpected-keyword-arg
+                                                ignore=409)
+        else:
+            response = await self.client.index(index=index, id=doc_id, body=document, if_seq_no=version[0], # pylint: disable=unexpected-keyword-arg
+                                               if_primary_term=version[1], refresh="wait_for", ignore=409)
+        if response.get("status") == 409:
+            return None
+        return response["_seq_no"], response["_primary_term"]
+
+    async def delete_versioned(self, index: str, doc_id: str, version: Tuple[int, int]) -> bool:
+        if self.client is None:
+            raise ValueError("elasticsearch is disabled")
+        response = await self.client.delete(index=index, id=doc_id, if_seq_no=version[0], if_primary_term=version[1], # pylint: disable=unexpected-keyword-arg
+                                            ignore=(404, 409))
+        return response.get("result") == "deleted"
+
     async def get_last_alert(self, node_name: str, alert_type: str) -> dict|None:
         return await self._get_last_alert(self.config.alert_index, node_name, alert_type)
 
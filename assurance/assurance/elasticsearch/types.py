@@ -1,17 +1,44 @@
+from pydantic import BaseModel, ConfigDict
 
 
-from pydantic import BaseModel, ConfigDict
+class ElasticsearchBulk(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    max_docs: int = 500
+    max_bytes: int = 5 * 1024 * 1024
+    linger: float = 1.0 # seconds
+    max_pending: int = 2 # batches in flight before writers have to wait
 
+class ElasticsearchMultiSearch(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    max_batch: int = 100 # searches per _msearch request
+    linger: float = 0.01 # seconds to wait for further searches
+
+class ElasticsearchRouting(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = True
+    discovery_ttl: int = 3600 # seconds the concrete index list of a pattern is cached
+    fallback_slots: int = 12 # older monthly indices searched per request after a miss
 
 class ElasticsearchNode(BaseModel):
     model_config = ConfigDict(strict=True)
+    enabled: bool = True # false: no cluster connection, e.g. for dry runs with document sinks
     host: str
     user: str
     passwd: str
     use_ssl: bool = True
     verify_ssl: bool = True
+    http_compress: bool = True # gzip request bodies
+    maxsize: int = 25 # connections per host in the pool
+    timeout: int = 30 # seconds per request
     alert_index: str = "nms_einstein-alerts_"
     keep_alive_index: str = "nms_einstein-keep_alive_"
+    state_index: str|None = "nms_einstein-state" # latest alert/keep-alive per key, None disables
+    state_fallback: bool = True # search the monthly history if the key is not in state_index
+    bulk: ElasticsearchBulk = ElasticsearchBulk()
+    msearch: ElasticsearchMultiSearch = ElasticsearchMultiSearch()
+    routing: ElasticsearchRouting = ElasticsearchRouting()
 
 class Elasticsearch(BaseModel):
     model_config = ConfigDict(strict=True)
@@ -1,9 +1,10 @@
 import json
 import os
 from typing import List
-import aiohttp
 
 from assurance.base.http import HttpClient
+from assurance.base.metrics import VENDOR_ERRORS, VENDOR_LATENCY
+from assurance.base.tracing import TRACER
 
 from .templats import (
     GET_DEVICES,
@@ -23,6 +24,7 @@ HEADERS = {
 }
 
 
+
 class F5BigIPSession:
     def __init__(self, config: F5BigIPNode):
         self.config = config
@@ -35,6 +37,7 @@ class F5BigIPSession:
 
     async def __aenter__(self):
         # Create aiohttp session
+        import aiohttp # pylint: disable=import-outside-toplevel
         connector_args = {}
         if self.config.verify_ssl is False:
             connector_args["ssl"] = False
@@ -79,6 +82,14 @@ class F5BigIPSession:
 
     async def _get(self, endpoint: str) -> dict:
         """Make GET request to F5 REST API"""
+        with VENDOR_LATENCY.time(vendor="bigip", endpoint=endpoint), TRACER.span("vendor_request", endpoint=endpoint):
+            try:
+                return await self._request(endpoint)
+            except Exception:
+                VENDOR_ERRORS.inc(vendor="bigip", endpoint=endpoint)
+                raise
+
+    async def _request(self, endpoint: str) -> dict:
         url = f"{self.base_url}{endpoint}"
         headers = {
             **HEADERS,
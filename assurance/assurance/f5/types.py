@@ -16,6 +16,7 @@ class F5BigIP(BaseModel):
     node: F5BigIPNode
     sla_code: str = "L08"
     einstein: bool = True
+    interval: float|None = None # seconds between daemon cycles, default schedule.interval
 
 
 class F5BigIPStatus(BaseModel):
@@ -1,8 +1,11 @@
+import asyncio
 import json
 import os
 from typing import List
 
 from assurance.base.http import HttpClient
+from assurance.base.metrics import VENDOR_ERRORS, VENDOR_LATENCY
+from assurance.base.tracing import TRACER
 
 from .templats import GET_DEVICES, GET_DEVICES_WITH_ADOM, GET_STATUS, LOGIN, LOGOUT
 from .types import FortiManagerNode, FortiManagerStatus, FortinetDevice
@@ -11,6 +14,9 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+LOGOUT_TIMEOUT = 10.0 # seconds a cancelled session waits for its logout
+
+
 class FortiManagerSession():
     def __init__(self, config: FortiManagerNode):
         self.config = config
@@ -29,8 +35,17 @@ class FortiManagerSession():
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        if self.config.api_token is None:
-            await self._logout()
+        try:
+            if self.config.api_token is None:
+                # an abandoned login stays open on the FortiManager, finish it even if cancelled
+                logout = asyncio.ensure_future(self._logout())
+                try:
+                    await asyncio.shield(logout)
+                except asyncio.CancelledError:
+                    await asyncio.wait([logout], timeout=LOGOUT_TIMEOUT) # before the client is closed
+                    raise
+        finally:
+            await self.http_client.close()
 
     def _format(self, template: str, **kwargs) -> dict:
         self.id += 1
@@ -40,9 +55,19 @@ class FortiManagerSession():
         if response["result"][0]["status"]["code"] != 0:
             raise ValueError(f'invalid response from server: {response["result"][0]["status"]["message"]}')
 
+    async def _post(self, payload: dict) -> dict:
+        """JSON-RPC request, timed per url of the request"""
+        endpoint = payload["params"][0]["url"]
+        with VENDOR_LATENCY.time(vendor="fortimanager", endpoint=endpoint), TRACER.span("vendor_request", endpoint=endpoint):
+            try:
+                return await self.http_client.json_post(payload)
+            except Exception:
+                VENDOR_ERRORS.inc(vendor="fortimanager", endpoint=endpoint)
+                raise
+
     async def _login(self):
         payload = self._format(LOGIN, user=self.config.api_user, passwd=self.config.api_passwd)
-        response = await self.http_client.json_post(payload)
+        response = await self._post(payload)
         if os.getenv('ASSURANCE_API_DEBUG') is not None:
             print("# --- login ---------------------------------")
             print(json.dumps(response, indent=4))
@@ -51,7 +76,7 @@ class FortiManagerSession():
 
     async def _logout(self):
         payload = self._format(LOGOUT)
-        response = await self.http_client.json_post(payload)
+        response = await self._post(payload)
         if os.getenv('ASSURANCE_API_DEBUG') is not None:
             print("# --- logout ---------------------------------")
             print(json.dumps(payload, indent=4))
@@ -91,7 +116,7 @@ class FortiManagerSession():
         fields = FortinetDevice.model_json_schema()["properties"].keys()
         fieldnames = ", ".join([f"\"{x}\"" for x in fields])
         payload = self._format(GET_DEVICES, fields=fieldnames)
-        response = await self.http_client.json_post(payload)
+        response = await self._post(payload)
         if os.getenv('ASSURANCE_API_DEBUG') is not None:
             print("# --- get_devices ---------------------------------")
             print(json.dumps(payload, indent=4))
@@ -110,7 +135,7 @@ class FortiManagerSession():
     
     async def get_devices_adoms(self) -> dict:
         payload = self._format(GET_DEVICES_WITH_ADOM)
-        response = await self.http_client.json_post(payload)
+        response = await self._post(payload)
         if os.getenv('ASSURANCE_API_DEBUG') is not None:
             print("# --- get_devices ---------------------------------")
             print(json.dumps(payload, indent=4))
@@ -126,7 +151,7 @@ class FortiManagerSession():
 
     async def get_status(self) -> FortiManagerStatus:
         payload = self._format(GET_STATUS)
-        response = await self.http_client.json_post(payload)
+        response = await self._post(payload)
         if os.getenv('ASSURANCE_API_DEBUG') is not None:
             print("# --- get_status ---------------------------------")
             print(json.dumps(payload, indent=4))
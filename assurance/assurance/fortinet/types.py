@@ -16,6 +16,7 @@ class FortiManager(BaseModel):
     node: FortiManagerNode
     sla_code: str = "L08"
     einstein: bool = True
+    interval: float|None = None # seconds between daemon cycles, default schedule.interval
 
 class FortiManagerStatus(BaseModel):
     sn: str
@@ -1,40 +1,126 @@
+import asyncio
 import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List
 
-import aiofiles
-from kafka import KafkaProducer
+from assurance.base.metrics import REGISTRY
+from assurance.base.tracing import TRACER
 
 from .types import KafkaNode
 
+if TYPE_CHECKING:
+    from kafka import KafkaProducer
+
+type DeliveryCallback = Callable[[Any, BaseException|None], Any]
+
+PRODUCE_LATENCY = REGISTRY.histogram("assurance_kafka_produce_seconds", "time from produce to broker acknowledgement",
+                                     ("topic",))
+PRODUCE_ERRORS = REGISTRY.counter("assurance_kafka_produce_errors_total", "messages not acknowledged by the broker",
+                                  ("topic",))
+
 
 class KafkaSession:
+    """Non-blocking producer session. kafka-python batches in its own I/O thread,
+    the calls that may block (construction, send on full buffer or missing
+    metadata, flush) run on a single worker thread so that the message order is
+    kept and the event loop never waits for a broker."""
+
     def __init__(self, config: KafkaNode):
         self.kafka_config = config
         self.producer = None
+        self._kafka_logger = logging.getLogger(__name__)
+        self._executor: ThreadPoolExecutor|None = None
+        self._deliveries: set[asyncio.Future] = set()
 
-    async def __aenter__(self):
+    def _create_producer(self) -> "KafkaProducer":
+        from kafka import KafkaProducer # pylint: disable=import-outside-toplevel
         ssl_params = {}
         if self.kafka_config.ssl_client_cert is not None:
             ssl_params = {
                 'ssl_certfile': self.kafka_config.ssl_client_cert.certfile,
                 'ssl_keyfile': self.kafka_config.ssl_client_cert.keyfile,
             }
+        return KafkaProducer(bootstrap_servers=self.kafka_config.bootstrap_servers,
+                             value_serializer=self._serialize,
+                             key_serializer=lambda k: k.encode('utf-8') if isinstance(k, str) else k,
+                             compression_type=self.kafka_config.compression_type,
+                             security_protocol=self.kafka_config.security_protocol,
+                             ssl_check_hostname=False,
+                             linger_ms=self.kafka_config.linger_ms,
+                             batch_size=self.kafka_config.batch_size,
+                             **ssl_params )
 
-        self.producer = KafkaProducer(bootstrap_servers=self.kafka_config.bootstrap_servers,
-                                      value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8'),
-                                      security_protocol=self.kafka_config.security_protocol,
-                                      ssl_check_hostname=False,
-                                      **ssl_params )
+    @staticmethod
+    def _serialize(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return json.dumps(value, default=str).encode('utf-8')
+
+    async def __aenter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-producer")
+        loop = asyncio.get_running_loop()
+        self.producer = await loop.run_in_executor(self._executor, self._create_producer)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         if self.producer is not None:
-            self.producer.close()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self.producer.flush, self.kafka_config.timeout)
+            if self._deliveries:
+                await asyncio.wait(self._deliveries, timeout=self.kafka_config.timeout)
+            if self._deliveries:
+                self._kafka_logger.error("%d kafka messages not acknowledged at close", len(self._deliveries))
+            await loop.run_in_executor(self._executor, self.producer.close, self.kafka_config.timeout)
+            self.producer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
     async def _read_password_from_file(self, filename) -> str:
+        import aiofiles # pylint: disable=import-outside-toplevel
         async with aiofiles.open(filename, 'r') as f:
             return await f.read()
 
-    async def produce(self, topic: str, message: dict):
-        if self.producer is not None:
-            future = self.producer.send(topic, message)
-            future.get(timeout=self.kafka_config.timeout)
+    def _send(self, topic: str, message: Any, key: str|None, headers: List[tuple[str, bytes]]|None,
+              delivery: asyncio.Future):
+        loop = delivery.get_loop()
+        def on_success(metadata):
+            loop.call_soon_threadsafe(lambda: delivery.done() or delivery.set_result(metadata))
+        def on_error(error):
+            loop.call_soon_threadsafe(lambda: delivery.done() or delivery.set_exception(error))
+        self.producer.send(topic, message, key=key, headers=headers).add_callback(on_success).add_errback(on_error) # type: ignore
+
+    def _delivered(self, future: asyncio.Future, callback: DeliveryCallback|None, topic: str, started: float):
+        self._deliveries.discard(future)
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            self._kafka_logger.error("kafka delivery failed: %s", error)
+            PRODUCE_ERRORS.inc(topic=topic)
+        elif not future.cancelled():
+            PRODUCE_LATENCY.observe(time.perf_counter() - started, topic=topic)
+        if callback is not None:
+            result = callback(None if error is not None or future.cancelled() else future.result(), error)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+
+    async def produce(self, topic: str, message: Any, callback: DeliveryCallback|None = None,
+                      key: str|None = None, headers: List[tuple[str, bytes]]|None = None) -> asyncio.Future:
+        """queue the message, the returned future resolves with the record metadata once acked.
+        Messages with the same key go to the same partition and keep their order."""
+        loop = asyncio.get_running_loop()
+        delivery = loop.create_future()
+        if self.producer is None:
+            delivery.set_result(None)
+            return delivery
+        self._deliveries.add(delivery)
+        started = time.perf_counter()
+        delivery.add_done_callback(lambda f: self._delivered(f, callback, topic, started))
+        with TRACER.span("produce", topic=topic, key=key or ""):
+            try:
+                await loop.run_in_executor(self._executor, self._send, topic, message, key, headers, delivery)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                if not delivery.done():
+                    delivery.set_exception(e)
+        return delivery
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -16,3 +16,6 @@ class KafkaNode(BaseModel):
     security_protocol: str = "PLAINTEXT"
     ssl_client_cert: SSLClientCert|None = None
     enabled: bool = True
+    linger_ms: int = 20 # wait for more messages before a batch is sent
+    batch_size: int = 65536 # bytes per partition batch
+    compression_type: Literal["gzip", "snappy", "lz4", "zstd"]|None = None # lz4/zstd need the lz4/zstandard packages
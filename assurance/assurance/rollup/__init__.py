@@ -0,0 +1,2 @@
+from .rollup import RollupJob
+from .types import Rollup, RollupSource
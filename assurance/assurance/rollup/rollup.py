@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from assurance.base.assurance import Assurance
+from assurance.elasticsearch import ElasticsearchSession
+
+from .types import Rollup, RollupSource
+
+INTERVALS = {
+    "1h": {"fixed_interval": "1h"},
+    "1d": {"calendar_interval": "1d"},
+}
+
+
+class RollupJob(Assurance):
+    """Downsamples raw device documents into hourly and daily aggregates per
+    device. Runs incrementally from a checkpoint up to the last full hour,
+    rollup documents have deterministic ids so reprocessing overwrites them."""
+
+    def __init__(self, config: Rollup, elasticsearch: ElasticsearchSession):
+        Assurance.__init__(self, __name__)
+        self.config = config
+        self.elasticsearch = elasticsearch
+
+    def _load_checkpoints(self) -> dict:
+        try:
+            with open(self.config.checkpoint_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoints(self, checkpoints: dict):
+        os.makedirs(os.path.dirname(self.config.checkpoint_file) or ".", exist_ok=True)
+        tmp = f"{self.config.checkpoint_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(checkpoints, f)
+        os.replace(tmp, self.config.checkpoint_file)
+
+    async def run(self):
+        if self.elasticsearch.client is None:
+            raise ValueError("rollup needs elasticsearch, it is disabled")
+        checkpoints = await asyncio.to_thread(self._load_checkpoints)
+        end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        for source in self.config.sources:
+            start = end - timedelta(hours=self.config.initial_lookback)
+            if source.index in checkpoints:
+                start = datetime.fromisoformat(checkpoints[source.index])
+            if start >= end:
+                continue
+            failed = self.elasticsearch.bulk.failed if self.elasticsearch.bulk is not None else 0
+            hours = await self._rollup(source, "1h", start, end)
+            # daily buckets are rebuilt from the raw documents for every touched day
+            days = await self._rollup(source, "1d", start.replace(hour=0), end)
+            self.logger.info("rollup %s [%s, %s): %d hourly, %d daily documents",
+                             source.index, start.isoformat(), end.isoformat(), hours, days)
+            if not await self._flushed(failed):
+                self.logger.error("rollup %s: documents failed, checkpoint stays at %s", source.index, start.isoformat())
+                continue
+            checkpoints[source.index] = end.isoformat()
+            await asyncio.to_thread(self._save_checkpoints, checkpoints)
+
+    async def _flushed(self, failed: int) -> bool:
+        """wait for the buffered bulk requests, False if documents failed since
+        the failure count was failed"""
+        bulk = self.elasticsearch.bulk
+        if bulk is None:
+            return True
+        await bulk.drain()
+        return bulk.failed == failed
+
+    def _query(self, source: RollupSource, interval: str, start: datetime, end: datetime, after: dict|None) -> dict:
+        composite: dict = {
+            "size": self.config.page_size,
+            "sources": [
+                {"key": {"terms": {"field": source.key_field}}},
+                {"bucket": {"date_histogram": {"field": "@timestamp", **INTERVALS[interval]}}},
+            ]
+        }
+        if after is not None:
+            composite["after"] = after
+        aggs: dict = {f"stats_{n}": {"stats": {"field": field}} for n, field in enumerate(source.fields)}
+        aggs["up"] = {"filter": {"terms": {source.up_field: source.up_values}}}
+        return {
+            "size": 0,
+            "track_total_hits": False,
+            "query": {"range": {"@timestamp": {"gte": start.isoformat(), "lt": end.isoformat()}}},
+            "aggs": {"buckets": {"composite": composite, "aggs": aggs}}
+        }
+
+    def _document(self, source: RollupSource, interval: str, bucket: dict) -> dict:
+        stamp = datetime.fromtimestamp(bucket["key"]["bucket"] / 1000, timezone.utc)
+        document: dict = {
+            "@timestamp": stamp.isoformat(),
+            "interval": interval,
+            "key": bucket["key"]["key"],
+            "samples": bucket["doc_count"],
+            "uptime": bucket["up"]["doc_count"] / bucket["doc_count"] if bucket["doc_count"] else 0.0,
+        }
+        for n, field in enumerate(source.fields):
+            stats = bucket[f"stats_{n}"]
+            document[field.replace(".", "_")] = {"min": stats["min"], "max": stats["max"], "avg": stats["avg"]}
+        return document
+
+    async def _rollup(self, source: RollupSource, interval: str, start: datetime, end: datetime) -> int:
+        count = 0
+        after = None
+        while True:
+            body = self._query(source, interval, start, end, after)
+            response = await self.elasticsearch.client.search(index=f"{source.index}*", body=body) # pylint: disable=unexpected-keyword-arg
+            aggregation = response.get("aggregations", {}).get("buckets", {"buckets": []})
+            for bucket in aggregation["buckets"]:
+                document = self._document(source, interval, bucket)
+                doc_id = hashlib.sha1(f"{document['key']}|{interval}|{document['@timestamp']}".encode("utf-8")).hexdigest()
+                index = f"{source.target}{interval}_{datetime.fromisoformat(document['@timestamp']).strftime('%Y.%m')}"
+                await self.elasticsearch.write(index, document, doc_id)
+                count += 1
+            after = aggregation.get("after_key")
+            if not aggregation["buckets"] or after is None:
+                return count
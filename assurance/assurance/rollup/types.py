@@ -0,0 +1,20 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RollupSource(BaseModel):
+    model_config = ConfigDict(strict=True)
+    index: str # raw device index prefix, e.g. data_index of the collector
+    target: str # rollup index prefix, written as {target}1h_%Y.%m and {target}1d_%Y.%m
+    key_field: str = "device.name.keyword"
+    fields: List[str] # numeric fields aggregated to min/max/avg
+    up_field: str = "device.conn_status.keyword"
+    up_values: List[str] = ["up"]
+
+class Rollup(BaseModel):
+    model_config = ConfigDict(strict=True)
+    sources: List[RollupSource]
+    checkpoint_file: str = "/var/tmp/assurance/rollup.json"
+    initial_lookback: int = 168 # hours processed on the first run
+    page_size: int = 500 # composite buckets per request
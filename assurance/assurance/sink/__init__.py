@@ -0,0 +1,13 @@
+from .builder import build_sink, document_sink, message_sink, spooled
+from .sink import (
+    ElasticsearchSink,
+    FanoutSink,
+    FileSink,
+    KafkaSink,
+    NullSink,
+    Sink,
+    StdoutSink,
+)
+from .spool import Spool
+from .spooling import SpoolingSink
+from .types import Output, SinkConfig, SpoolConfig
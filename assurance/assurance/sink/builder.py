@@ -0,0 +1,59 @@
+import logging
+from typing import List
+
+from assurance.elasticsearch import ElasticsearchSession
+from assurance.kafka import KafkaNode
+
+from .sink import ElasticsearchSink, FanoutSink, FileSink, KafkaSink, NullSink, Sink, StdoutSink
+from .spooling import SpoolingSink
+from .types import SinkConfig, SpoolConfig
+
+
+def build_sink(configs: List[SinkConfig], kafka: KafkaNode|None = None,
+               elasticsearch: ElasticsearchSession|None = None) -> Sink:
+    sinks: List[Sink] = []
+    for config in configs:
+        match config.type:
+            case "kafka":
+                if kafka is None:
+                    raise ValueError("kafka sink is only available for einstein messages")
+                if not kafka.enabled:
+                    logging.getLogger(__name__).warning("kafka sink configured but kafka is disabled, messages are discarded")
+                    sinks.append(NullSink())
+                    continue
+                sinks.append(KafkaSink(kafka))
+            case "elasticsearch":
+                if elasticsearch is None:
+                    raise ValueError("elasticsearch sink is only available for documents")
+                sinks.append(ElasticsearchSink(elasticsearch))
+            case "file":
+                sinks.append(FileSink(config.path))
+            case "stdout":
+                sinks.append(StdoutSink())
+            case "null":
+                sinks.append(NullSink())
+    if not sinks:
+        return NullSink()
+    if len(sinks) == 1:
+        return sinks[0]
+    return FanoutSink(sinks)
+
+
+def spooled(sink: Sink, spool: SpoolConfig|None, name: str, worker: int|None = None) -> Sink:
+    if spool is None or not spool.enabled or sink.discards:
+        return sink
+    return SpoolingSink(sink, spool, name, worker)
+
+
+def message_sink(configs: List[SinkConfig]|None, kafka: KafkaNode, spool: SpoolConfig|None = None,
+                 worker: int|None = None) -> Sink:
+    if configs is None:
+        configs = [SinkConfig(type="kafka" if kafka.enabled else "null")]
+    return spooled(build_sink(configs, kafka=kafka), spool, "messages", worker)
+
+
+def document_sink(configs: List[SinkConfig]|None, elasticsearch: ElasticsearchSession,
+                  spool: SpoolConfig|None = None, worker: int|None = None) -> Sink:
+    if configs is None:
+        configs = [SinkConfig(type="elasticsearch")]
+    return spooled(build_sink(configs, elasticsearch=elasticsearch), spool, "documents", worker)
@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import json
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, List
+
+from assurance.elasticsearch import ElasticsearchSession
+from assurance.kafka import KafkaNode, KafkaSession
+
+
+# stream, record, key, headers, doc_id
+Record = tuple[str, Any, str|None, List[tuple[str, bytes]]|None, str|None]
+
+
+class Sink(ABC):
+    """Output of einstein messages (stream = topic) and documents (stream = index)."""
+    discards = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    @abstractmethod
+    async def emit(self, stream: str, record: Any, key: str|None = None,
+                   headers: List[tuple[str, bytes]]|None = None, doc_id: str|None = None) -> asyncio.Future|None:
+        """None if the record is written (or buffered) on return, otherwise a future
+        that resolves once it is delivered or handed to the fallback and fails if
+        it is lost"""
+
+    async def healthy(self) -> bool:
+        return True
+
+    def set_fallback(self, fallback: Callable[[list[Record]], Awaitable]):
+        """records that fail after emit() returned, e.g. buffered bulk writes or
+        unacknowledged kafka messages, are passed to fallback as emit() arguments"""
+
+
+def _envelope(stream: str, record: Any, key: str|None, doc_id: str|None) -> str:
+    if isinstance(record, bytes):
+        record = {"base64": base64.b64encode(record).decode("ascii")}
+    envelope = {"stream": stream, "key": key, "id": doc_id, "record": record}
+    return json.dumps({k: v for k, v in envelope.items() if v is not None}, default=str)
+
+
+class NullSink(Sink):
+    discards = True
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        pass
+
+
+class StdoutSink(Sink):
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        sys.stdout.write(_envelope(stream, record, key, doc_id) + "\n")
+
+
+class FileSink(Sink):
+    """appends one JSON line per record to path, {stream} in path is replaced"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._files: dict[str, Any] = {}
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for f in self._files.values():
+            await f.close()
+        self._files = {}
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        path = self.path.format(stream=stream)
+        if path not in self._files:
+            import aiofiles # pylint: disable=import-outside-toplevel
+            self._files[path] = await aiofiles.open(path, "a", encoding="utf-8")
+        await self._files[path].write(_envelope(stream, record, key, doc_id) + "\n")
+        await self._files[path].flush()
+
+
+class KafkaSink(Sink):
+    def __init__(self, config: KafkaNode):
+        self.session = KafkaSession(config)
+        self._fallback = None
+        self._settling: set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        await self.session.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.session.__aexit__(exc_type, exc, tb)
+        finally:
+            if self._settling: # failed deliveries still reach the fallback
+                await asyncio.wait(self._settling)
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        """returns once the message is queued, without waiting for the broker"""
+        delivery = await self.session.produce(stream, record, key=key, headers=headers)
+        settled = asyncio.create_task(self._settle(delivery, (stream, record, key, headers, doc_id)))
+        self._settling.add(settled)
+        settled.add_done_callback(self._settled)
+        return settled
+
+    async def _settle(self, delivery: asyncio.Future, record: Record):
+        try:
+            await delivery
+        except Exception: # pylint: disable=broad-exception-caught
+            if self._fallback is None:
+                raise
+            await self._fallback([record])
+
+    def _settled(self, settled: asyncio.Task):
+        self._settling.discard(settled)
+        if not settled.cancelled():
+            settled.exception() # logged by the session, re-raised only to callers awaiting it
+
+    def set_fallback(self, fallback):
+        self._fallback = fallback
+
+    async def healthy(self) -> bool:
+        return self.session.producer is not None and self.session.producer.bootstrap_connected()
+
+
+class ElasticsearchSink(Sink):
+    """writes through an ElasticsearchSession owned by the caller"""
+
+    def __init__(self, elasticsearch: ElasticsearchSession):
+        self.elasticsearch = elasticsearch
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        await self.elasticsearch.index_document(stream, record, doc_id)
+
+    async def healthy(self) -> bool:
+        return self.elasticsearch.client is None or await self.elasticsearch.client.ping()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.elasticsearch.bulk is not None:
+            await self.elasticsearch.bulk.drain() # failures still reach the fallback
+
+    def set_fallback(self, fallback):
+        if self.elasticsearch.bulk is not None:
+            self.elasticsearch.bulk.fallback = lambda failed: fallback(
+                [(index, document, None, None, doc_id) for index, doc_id, document in failed])
+
+
+class FanoutSink(Sink):
+    def __init__(self, sinks: List[Sink]):
+        self.sinks = sinks
+        self.discards = all(sink.discards for sink in sinks)
+
+    async def __aenter__(self):
+        for sink in self.sinks:
+            await sink.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for sink in reversed(self.sinks):
+            await sink.__aexit__(exc_type, exc, tb)
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        deliveries = [delivery for sink in self.sinks
+                      if (delivery := await sink.emit(stream, record, key, headers, doc_id)) is not None]
+        return asyncio.gather(*deliveries) if deliveries else None
+
+    async def healthy(self) -> bool:
+        for sink in self.sinks:
+            if not await sink.healthy():
+                return False
+        return True
+
+    def set_fallback(self, fallback):
+        for sink in self.sinks:
+            sink.set_fallback(fallback)
@@ -0,0 +1,165 @@
+import base64
+import fcntl
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Any, Iterator, List
+
+from .types import SpoolConfig
+
+_FRAME = struct.Struct(">I")
+
+
+def encode_record(stream: str, record: Any, key: str|None, headers: List[tuple[str, bytes]]|None,
+                  doc_id: str|None) -> bytes:
+    data: dict = {"s": stream}
+    if isinstance(record, bytes):
+        data["b"] = base64.b64encode(record).decode("ascii")
+    else:
+        data["r"] = record
+    if key is not None:
+        data["k"] = key
+    if headers:
+        data["h"] = [[name, base64.b64encode(value).decode("ascii")] for name, value in headers]
+    if doc_id is not None:
+        data["i"] = doc_id
+    return json.dumps(data, default=str).encode("utf-8")
+
+
+def decode_record(payload: bytes) -> tuple[str, Any, str|None, List[tuple[str, bytes]]|None, str|None]:
+    data = json.loads(payload)
+    record = base64.b64decode(data["b"]) if "b" in data else data["r"]
+    headers = [(name, base64.b64decode(value)) for name, value in data["h"]] if "h" in data else None
+    return data["s"], record, data.get("k"), headers, data.get("i")
+
+
+class Spool:
+    """Append-only spool of length prefixed records in numbered segment files.
+    Segments are read memory-mapped once they are closed for writing, fully
+    replayed segments are deleted. When max_bytes is exceeded the oldest
+    segments are dropped. A spool directory is locked by one process, worker
+    processes get their own, further replicas on the host use the next free
+    one of directory, directory.1, ..."""
+
+    def __init__(self, config: SpoolConfig, name: str, worker: int|None = None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.directory = os.path.join(config.directory, name if worker is None else f"{name}-worker{worker}")
+        self._lock = None
+        self._writer = None
+        self._write_segment: str|None = None
+        self._read_segment: str|None = None # of the last peek(), commit() applies to it
+        self._read_offset = 0
+        self.depth = 0 # records
+        self.size = 0 # bytes
+        self.dropped = 0
+
+    def open(self):
+        base, slot = self.directory, 0
+        while not self._acquire(self.directory):
+            slot += 1
+            self.directory = f"{base}.{slot}"
+        for segment in self._segments():
+            self.size += os.path.getsize(segment)
+            self.depth += sum(1 for _ in self._frames(segment, 0))
+        if self.depth:
+            self.logger.warning("spool %s holds %d records from a previous run", self.directory, self.depth)
+
+    def _acquire(self, directory: str) -> bool:
+        os.makedirs(directory, exist_ok=True)
+        lock = open(os.path.join(directory, ".lock"), "a", encoding="utf-8") # pylint: disable=consider-using-with
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._lock = lock
+        return True
+
+    def close(self):
+        self._close_writer()
+        if self._lock is not None:
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+            self._lock.close()
+            self._lock = None
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _segments(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.log")))
+
+    def _next_segment(self) -> str:
+        segments = self._segments()
+        number = int(os.path.basename(segments[-1])[8:-4]) + 1 if segments else 0
+        return os.path.join(self.directory, f"segment-{number:012d}.log")
+
+    def append(self, payload: bytes):
+        if self._writer is None or self._writer.tell() >= self.config.segment_bytes:
+            self._close_writer()
+            self._write_segment = self._next_segment()
+            self._writer = open(self._write_segment, "ab") # pylint: disable=consider-using-with
+        self._writer.write(_FRAME.pack(len(payload)) + payload)
+        self._writer.flush()
+        self.depth += 1
+        self.size += _FRAME.size + len(payload)
+        while self.size > self.config.max_bytes and len(self._segments()) > 1:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        oldest = self._segments()[0]
+        count = sum(1 for _ in self._frames(oldest, self._read_offset))
+        self.size -= os.path.getsize(oldest)
+        os.remove(oldest)
+        if oldest == self._read_segment:
+            self._read_segment = None # records of a replay in progress, counted as dropped
+        self._read_offset = 0
+        self.depth = max(0, self.depth - count)
+        self.dropped += count
+        self.logger.error("spool %s full, dropped %d records of %s", self.directory, count, oldest)
+
+    @staticmethod
+    def _frames(segment: str, offset: int) -> Iterator[tuple[bytes, int]]:
+        if os.path.getsize(segment) <= offset:
+            return
+        with open(segment, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while offset + _FRAME.size <= len(data):
+                (length,) = _FRAME.unpack_from(data, offset)
+                end = offset + _FRAME.size + length
+                if end > len(data):
+                    return # incomplete frame of an interrupted write
+                yield data[offset + _FRAME.size:end], end
+                offset = end
+
+    def peek(self, limit: int) -> Iterator[bytes]:
+        """oldest records, call commit() for each one that was delivered"""
+        segments = self._segments()
+        if not segments:
+            return
+        if segments[0] == self._write_segment:
+            self._close_writer() # segments are only read once closed for writing
+            self._write_segment = None
+        self._read_segment = segments[0]
+        for payload, _ in self._frames(segments[0], self._read_offset):
+            if limit <= 0:
+                return
+            limit -= 1
+            yield payload
+
+    def commit(self, payload: bytes):
+        """no-op if the segment of the record was dropped since peek()"""
+        segment = self._read_segment
+        if segment is None or not os.path.exists(segment):
+            return
+        self._read_offset += _FRAME.size + len(payload)
+        self.depth = max(0, self.depth - 1)
+        if self._read_offset >= os.path.getsize(segment):
+            self.size -= os.path.getsize(segment)
+            os.remove(segment)
+            self._read_segment = None
+            self._read_offset = 0
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+
+from assurance.base.metrics import REGISTRY
+
+from .sink import Record, Sink
+from .spool import Spool, decode_record, encode_record
+from .types import SpoolConfig
+
+SPOOL_DEPTH = REGISTRY.gauge("assurance_spool_records", "records waiting in the spool", ("spool",))
+SPOOL_BYTES = REGISTRY.gauge("assurance_spool_bytes", "size of the spool", ("spool",))
+SPOOL_DROPPED = REGISTRY.gauge("assurance_spool_dropped_records", "records dropped because the spool was full", ("spool",))
+
+
+class SpoolingSink(Sink):
+    """Writes to the inner sink within the latency budget, otherwise to a local
+    spool. While the spool is not empty every record is spooled to keep the
+    order, a background task replays it once the inner sink is healthy again.
+    Delivery is at least once: a write that timed out may still arrive."""
+
+    def __init__(self, inner: Sink, config: SpoolConfig, name: str, worker: int|None = None):
+        self.logger = logging.getLogger(__name__)
+        self.inner = inner
+        self.config = config
+        self.spool = Spool(config, name, worker)
+        self.discards = inner.discards
+        self._failed_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._replay: asyncio.Task|None = None
+        SPOOL_DEPTH.register(lambda: self.spool.depth, spool=name)
+        SPOOL_BYTES.register(lambda: self.spool.size, spool=name)
+        SPOOL_DROPPED.register(lambda: self.spool.dropped, spool=name)
+
+    async def __aenter__(self):
+        await self.inner.__aenter__()
+        self.spool.open()
+        self.inner.set_fallback(self._fallback)
+        self._replay = asyncio.create_task(self._replay_loop())
+        if self.spool.depth:
+            self._wakeup.set()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._replay is not None:
+            self._replay.cancel()
+            await asyncio.gather(self._replay, return_exceptions=True)
+        try:
+            await self.inner.__aexit__(exc_type, exc, tb)
+        finally:
+            self.spool.close()
+            if self.spool.depth:
+                self.logger.warning("spool %s keeps %d records (%d bytes) for the next run",
+                                    self.spool.directory, self.spool.depth, self.spool.size)
+
+    def _append(self, stream, record, key=None, headers=None, doc_id=None):
+        self.spool.append(encode_record(stream, record, key, headers, doc_id))
+        self._wakeup.set()
+
+    async def _fallback(self, records: list[Record]):
+        self._failed_at = time.monotonic()
+        for record in records:
+            self._append(*record)
+
+    async def emit(self, stream, record, key=None, headers=None, doc_id=None):
+        if self.spool.depth:
+            self._append(stream, record, key, headers, doc_id)
+            return None
+        try:
+            return await asyncio.wait_for(self.inner.emit(stream, record, key, headers, doc_id), self.config.latency_budget)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.warning("sink failed (%s), spooling to %s", e or type(e).__name__, self.spool.directory)
+            self._failed_at = time.monotonic()
+            self._append(stream, record, key, headers, doc_id)
+            return None
+
+    async def _replay_loop(self):
+        while True:
+            await self._wakeup.wait()
+            if not self.spool.depth:
+                self._wakeup.clear()
+                continue
+            await asyncio.sleep(max(0.0, self._failed_at + self.config.retry_interval - time.monotonic()))
+            try:
+                if not await asyncio.wait_for(self.inner.healthy(), self.config.latency_budget):
+                    self._failed_at = time.monotonic()
+                    continue
+                await self._replay_batch()
+            except Exception as e: # pylint: disable=broad-exception-caught
+                self.logger.warning("spool replay of %s failed: %s", self.spool.directory, e or type(e).__name__)
+                self._failed_at = time.monotonic()
+
+    async def _replay_batch(self):
+        started = time.monotonic()
+        for payload in list(self.spool.peek(self.config.replay_batch)):
+            if self._failed_at > started:
+                return # the inner sink failed again in the meantime
+            stream, record, key, headers, doc_id = decode_record(payload)
+            await asyncio.wait_for(self.inner.emit(stream, record, key, headers, doc_id), self.config.latency_budget)
+            self.spool.commit(payload)
+        if not self.spool.depth:
+            self.logger.info("spool %s replayed", self.spool.directory)
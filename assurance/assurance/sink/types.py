@@ -0,0 +1,25 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SinkConfig(BaseModel):
+    model_config = ConfigDict(strict=True)
+    type: Literal["kafka", "elasticsearch", "file", "stdout", "null"]
+    path: str = "assurance-{stream}.jsonl" # file sink, {stream} is the topic or index
+
+class SpoolConfig(BaseModel):
+    model_config = ConfigDict(strict=True)
+    enabled: bool = False
+    directory: str = "/var/tmp/assurance/spool" # one subdirectory per sink
+    segment_bytes: int = 16 * 1024 * 1024
+    max_bytes: int = 1024 * 1024 * 1024 # oldest segments are dropped above this
+    latency_budget: float = 5.0 # seconds per write before the sink is considered down
+    retry_interval: float = 10.0 # seconds between replay attempts
+    replay_batch: int = 500 # records replayed before checking health again
+
+class Output(BaseModel):
+    model_config = ConfigDict(strict=True)
+    messages: List[SinkConfig]|None = None # einstein messages, default kafka (null if kafka.enabled is false)
+    documents: List[SinkConfig]|None = None # elasticsearch writes, default elasticsearch
+    spool: SpoolConfig = SpoolConfig()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3.12
+"""
+Import time benchmark with a budget. Every module is imported in fresh
+interpreters with `-X importtime`; the median cumulative import time is
+compared to the budget and the heavy client libraries must not be imported
+eagerly (they are loaded when a session is opened). Exit code 1 on a
+regression, so it can run as a check before a release:
+
+    python3.12 benchmarks/importtime.py [--runs 7] [--budget-ms 400] [module ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "assurance.base.main",
+    "assurance.base.collector",
+    "assurance.einstein",
+    "assurance.elasticsearch",
+    "assurance.kafka",
+    "assurance.sink",
+]
+
+# loaded on first use only
+LAZY = ["elasticsearch7", "kafka", "aiohttp", "aiofiles"]
+
+
+def measure(module: str) -> tuple[int, set[str]]:
+    """cumulative import time of module in microseconds and all imported modules"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    cumulative, imported = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, total, name = line.split("|")
+        imported.add(name.strip())
+        if name.strip() == module:
+            cumulative = int(total)
+    return cumulative, imported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="median import time per module")
+    args = parser.parse_args()
+    failed = False
+    for module in args.modules:
+        times, imported = [], set()
+        for _ in range(args.runs):
+            cumulative, modules = measure(module)
+            times.append(cumulative / 1000)
+            imported |= modules
+        median = statistics.median(times)
+        eager = [lazy for lazy in LAZY if lazy in imported]
+        ok = median <= args.budget_ms and not eager
+        failed |= not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module:30} median {median:7.1f} ms  (min {min(times):.1f}, max {max(times):.1f})"
+              + (f"  eager: {', '.join(eager)}" if eager else ""))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())